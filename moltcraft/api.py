@@ -7,9 +7,12 @@ import asyncio
 import random
 import re
 import secrets
+import base64
+import json
 import zipfile
 import tempfile
 from pathlib import Path
+from datetime import datetime, timezone
 from concurrent.futures import ProcessPoolExecutor
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -25,11 +28,14 @@ import httpx
 import uvicorn
 import asyncpg
 
-from rcon import RconPool
-from db import init_pool, close_pool, init_db, execute, fetchone, fetchall
-from grid import get_next_grid_coords, grid_to_world, get_plot_bounds, get_buildable_origin, get_decoration_commands, PLOT_SIZE, GROUND_Y
+from rcon import RconPool, INTERACTIVE, BUILD, BACKGROUND
+from forceload import ForceloadCache, READY_TIMEOUT as FORCELOAD_READY_TIMEOUT
+from db import init_pool, close_pool, init_db, execute, fetchone, fetchall, transaction
+from grid import spiral_coords, world_to_grid, nearest_grid, grid_distance, grid_to_world, get_plot_bounds, get_buildable_origin, get_decoration_regions, get_reset_commands, PLOT_SIZE, GROUND_Y
 from sandbox import execute_build_script
-from nbt_builder import blocks_to_nbt, get_structure_offset, generate_reset_nbt
+from nbt_builder import get_structure_offset, generate_reset_nbt, cleanup_sized_reset_templates, structure_stem
+import structure_cache
+from voxels import discard_shared, cleanup_shared
 
 API_VERSION = "0.5.0"
 BOT_MANAGER_URL = "http://127.0.0.1:3001"
@@ -41,13 +47,63 @@ MAX_PLAYERS = 100
 BOT_CAP = 20
 RESERVED_HUMAN_SPOTS = 30
 BOT_IDLE_TIMEOUT = 60
-
-rcon_pool = RconPool(size=4)
+# Multi-piece placements wait between pieces while the server is over this tick time.
+PLACE_BUSY_MSPT = float(os.environ.get("PLACE_BUSY_MSPT", "40"))
+PLACE_MAX_PACING = float(os.environ.get("PLACE_MAX_PACING", "10"))
+# Freshly generated chunks take a while to come up; world decoration waits this long per region.
+DECORATION_READY_TIMEOUT = 30.0
+PROJECT_TOTAL_TTL = 30
+AGENT_CACHE_TTL = 30
+ACTIVITY_FLUSH_INTERVAL = 5
+NEARBY_MAX_RADIUS = 10
+# Workers per build stage: script + bot walk, NBT encode, RCON placement.
+BUILD_STAGE_WORKERS = {
+    "prepare": int(os.environ.get("BUILD_PREPARE_WORKERS", "2")),
+    "encode": int(os.environ.get("BUILD_ENCODE_WORKERS", "2")),
+    "place": int(os.environ.get("BUILD_PLACE_WORKERS", "2")),
+}
+BUILD_QUEUE_MAX = 100
+BUILD_STAGE_QUEUE = 4
+# Finished jobs stay queryable for this long, up to BUILD_JOB_HISTORY of them.
+BUILD_JOB_TTL = 600
+BUILD_JOB_HISTORY = 1000
+WORLD_DIR = Path(__file__).resolve().parent.parent / "minecraft-server" / "world"
+WORLD_ID_FILE = "moltcraft-world-id"
+PROJECT_COLUMNS = "id, name, description, agent_id, grid_x, grid_z, upvotes, created_at"
+# Keyset columns per browse order; all descending, id breaks ties.
+PROJECT_CURSOR_KEYS = {
+    "newest": ("created_at", "id"),
+    "top": ("upvotes", "created_at", "id"),
+}
+
+rcon_pool = RconPool(size=4,
+                     host=os.environ.get("RCON_HOST", "localhost"),
+                     port=int(os.environ.get("RCON_PORT", "25575")))
+forceloads = ForceloadCache(rcon_pool)
 plot_locks: dict[tuple[int, int], asyncio.Lock] = {}
-process_pool = ProcessPoolExecutor(max_workers=2)
+# Scripts and encoding get separate processes, so an encode never sits in front of a
+# script whose 10s limit is already running; one process per stage worker.
+process_pool = ProcessPoolExecutor(max_workers=BUILD_STAGE_WORKERS["prepare"])
+encode_pool = ProcessPoolExecutor(max_workers=BUILD_STAGE_WORKERS["encode"])
 bot_despawn_tasks: dict[str, asyncio.Task] = {}
+build_queue: asyncio.Queue = asyncio.Queue(maxsize=BUILD_QUEUE_MAX)
+# Builds move prepare -> encode -> place; the small later queues give back-pressure.
+build_stages: dict[str, asyncio.Queue] = {
+    "prepare": build_queue,
+    "encode": asyncio.Queue(maxsize=BUILD_STAGE_QUEUE),
+    "place": asyncio.Queue(maxsize=BUILD_STAGE_QUEUE),
+}
+# job id -> job, oldest first; project id -> id of its queued or running job.
+build_jobs: dict[str, dict] = {}
+_active_builds: dict[int, str] = {}
 
 _rate_limit_store: dict[str, list[float]] = {}
+_project_total_cache = {"value": None, "expires": 0.0}
+_world = {"id": None}
+# identifier -> (expires, agents row); dropped on connect/disconnect.
+_agent_cache: dict[str, tuple[float, dict]] = {}
+# identifier -> monotonic time of the latest request, written back in batches.
+_pending_activity: dict[str, float] = {}
 
 
 def _check_rate_limit(key: str, max_requests: int, window_seconds: int = 60):
@@ -73,20 +129,248 @@ def _get_plot_lock(grid_x: int, grid_z: int) -> asyncio.Lock:
 
 
 async def run_build_script(script, build_origin, buildable):
-    loop = asyncio.get_event_loop()
+    future = process_pool.submit(execute_build_script, script, build_origin,
+                                 buildable)
     try:
-        return await asyncio.wait_for(
-            loop.run_in_executor(process_pool, execute_build_script,
-                                  script, build_origin, buildable),
-            timeout=10.0
-        )
+        result = await asyncio.wait_for(asyncio.wrap_future(future),
+                                        timeout=10.0)
     except asyncio.TimeoutError:
+        future.add_done_callback(_discard_orphaned_result)
         return {
             "success": False,
-            "blocks": {},
+            "blocks": None,
             "block_count": 0,
             "error": "Script execution timed out (10 second limit). Simplify your script or reduce loops.",
         }
+    return result
+
+
+def _discard_orphaned_result(future):
+    if future.cancelled() or future.exception():
+        return
+    discard_shared(future.result().get("blocks"))
+
+
+async def encode_build(blocks_ref: dict, project_id: int,
+                       cache_key: Optional[str], block_count: int,
+                       origin: dict, placed_stem: Optional[str]) -> dict:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(encode_pool,
+                                      structure_cache.build_structure,
+                                      blocks_ref, project_id, cache_key,
+                                      block_count, origin, placed_stem)
+
+
+async def diff_cached_build(project_id: int, placed_stem: str, stem: str,
+                            origin: dict) -> Optional[dict]:
+    if placed_stem == stem:
+        return {"pieces": [], "stem": None, "bounds": None, "count": 0}
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(encode_pool,
+                                      structure_cache.build_diff, project_id,
+                                      placed_stem, stem, origin)
+
+
+async def lookup_cached_build(project_id: int,
+                              cache_key: Optional[str]) -> Optional[dict]:
+    if not cache_key:
+        return None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, structure_cache.lookup,
+                                      project_id, cache_key)
+
+
+async def prepare_reset_template() -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(encode_pool, generate_reset_nbt)
+
+
+_MSPT_RE = re.compile(r"Average time per tick: ([\d.]+)ms")
+
+
+async def _server_mspt() -> Optional[float]:
+    result = await rcon_pool.command_safe("/tick query", "Tick query")
+    match = _MSPT_RE.search(result or "")
+    if not match:
+        return None
+    mspt = float(match.group(1))
+    rcon_pool.observe_mspt(mspt)
+    return mspt
+
+
+async def _pace_placement(project_id: int, deadline: float):
+    # Let the server catch up on the previous piece before queuing the next one.
+    while time.monotonic() < deadline:
+        mspt = await _server_mspt()
+        if mspt is None or mspt <= PLACE_BUSY_MSPT:
+            return
+        print(f"[BUILD {project_id}] Server busy ({mspt:.1f} mspt), pausing placement")
+        await asyncio.sleep(max(0.0, min(0.5, deadline - time.monotonic())))
+
+
+def _current_world_id() -> Optional[str]:
+    # Kept inside the world folder so it travels with backups; a freshly generated world
+    # gets a new id, which makes every recorded decoration stale.
+    if _world["id"] is None and WORLD_DIR.is_dir():
+        path = WORLD_DIR / WORLD_ID_FILE
+        try:
+            _world["id"] = path.read_text().strip()
+        except FileNotFoundError:
+            _world["id"] = secrets.token_hex(8)
+            path.write_text(_world["id"])
+    return _world["id"]
+
+
+def _fill_failed(result: str) -> bool:
+    result = result.lower()
+    return "not loaded" in result or "too many blocks" in result or "unknown" in result
+
+
+async def _fill_region(region: dict, label: str, priority: str, load_chunks: bool) -> tuple[int, list]:
+    if not load_chunks:
+        return await rcon_pool.batch(region["commands"], label, priority, failed=_fill_failed)
+    # Hold the plots and the region's chunks like a build would, so neither side
+    # un-forces or overwrites the other.
+    locks = [_get_plot_lock(*p) for p in region["plots"]]
+    for lock in locks:
+        await lock.acquire()
+    try:
+        loaded = await forceloads.acquire(region["bounds"], priority, DECORATION_READY_TIMEOUT)
+        try:
+            if not loaded:
+                # Fills into unloaded chunks fail anyway; leave the region for the next pass.
+                return 0, [f"chunks not loaded after {DECORATION_READY_TIMEOUT:.0f}s"]
+            return await rcon_pool.batch(region["commands"], label, priority, failed=_fill_failed)
+        finally:
+            forceloads.release(region["bounds"])
+    finally:
+        for lock in locks:
+            lock.release()
+
+
+async def _decorate_plots(plots, label: str = "Decoration", priority: str = BUILD,
+                          load_chunks: bool = False) -> int:
+    world_id = _current_world_id()
+    plots = set(plots)
+    if world_id and plots:
+        xs, zs = zip(*plots)
+        done = await fetchall(
+            "SELECT grid_x, grid_z FROM decorated_plots WHERE world_id = $1 AND (grid_x, grid_z) IN (SELECT * FROM unnest($2::int[], $3::int[]))",
+            (world_id, list(xs), list(zs)))
+        plots -= {(r["grid_x"], r["grid_z"]) for r in done}
+    if not plots:
+        return 0
+
+    commands_run = 0
+    decorated = []
+    while plots:
+        # Bulk decoration leaves plots a build is working on to that build, which decorates
+        # its own plot under the plot lock.
+        busy = {p for p in plots if _get_plot_lock(*p).locked()} if load_chunks else set()
+        retry = set()
+        for region in get_decoration_regions(plots - busy):
+            if load_chunks and any(_get_plot_lock(*p).locked() for p in region["plots"]):
+                retry.update(region["plots"])
+                continue
+            executed, errors = await _fill_region(region, label, priority, load_chunks)
+            commands_run += executed
+            if errors:
+                print(f"[API] {label}: {len(errors)} failed fills, e.g. {errors[0]}")
+            else:
+                decorated.extend(region["plots"])
+        plots = retry
+
+    if decorated and world_id:
+        await execute(
+            """
+            INSERT INTO decorated_plots (grid_x, grid_z, world_id)
+            SELECT v.grid_x, v.grid_z, $3 FROM unnest($1::int[], $2::int[]) AS v(grid_x, grid_z)
+            ON CONFLICT (grid_x, grid_z) DO UPDATE SET world_id = EXCLUDED.world_id, decorated_at = NOW()
+            """,
+            ([x for x, _ in decorated], [z for _, z in decorated], world_id),
+        )
+    return commands_run
+
+
+async def _decorate_world():
+    # A restored or freshly generated world: decorate every claimed plot in merged fills.
+    world_id = _current_world_id()
+    if not world_id:
+        return
+    rows = await fetchall(
+        """
+        SELECT p.grid_x, p.grid_z FROM projects p
+        LEFT JOIN decorated_plots d
+          ON d.grid_x = p.grid_x AND d.grid_z = p.grid_z AND d.world_id = $1
+        WHERE d.grid_x IS NULL
+        """, (world_id, ))
+    if not rows:
+        return
+    print(f"[API] Decorating {len(rows)} plots for world {world_id}")
+    executed = await _decorate_plots([(r["grid_x"], r["grid_z"]) for r in rows],
+                                     "World decoration", BACKGROUND, load_chunks=True)
+    print(f"[API] World decoration done: {executed} fills")
+
+
+def new_build_job(project_id: int, agent_id: str) -> dict:
+    return {
+        "id": secrets.token_hex(8),
+        "project_id": project_id,
+        "agent_id": agent_id,
+        "status": "queued",
+        "phase": "queued",
+        "progress": {},
+        "queued_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        # Working state handed from stage to stage; dropped when the job finishes.
+        "build": {},
+    }
+
+
+def _set_build_phase(job: dict, phase: str, **progress):
+    job["phase"] = phase
+    job["progress"] = progress
+
+
+def _prune_build_jobs():
+    cutoff = time.time() - BUILD_JOB_TTL
+    finished = [job for job in build_jobs.values() if job["finished_at"] is not None]
+    excess = len(build_jobs) - BUILD_JOB_HISTORY
+    for job in finished:
+        if job["finished_at"] < cutoff or excess > 0:
+            del build_jobs[job["id"]]
+            excess -= 1
+
+
+def _timestamp(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def format_build_job(job: dict) -> dict:
+    result = job["result"]
+    return {
+        "job_id": job["id"],
+        "project_id": job["project_id"],
+        "status": job["status"],
+        "phase": job["phase"],
+        "progress": job["progress"],
+        "queued_at": _timestamp(job["queued_at"]),
+        "started_at": _timestamp(job["started_at"]),
+        "finished_at": _timestamp(job["finished_at"]),
+        "result": {k: v for k, v in result.items() if k != "next_steps"} if result else None,
+    }
+
+
+def _structure_world_box(bounds, origin: dict) -> list:
+    if bounds is None:
+        return []
+    x1, y1, z1, x2, y2, z2 = bounds
+    return [
+        origin["x"] + x1, origin["y"] + y1, origin["z"] + z1,
+        origin["x"] + x2, origin["y"] + y2, origin["z"] + z2,
+    ]
 
 
 async def _apply_gamerules():
@@ -106,7 +390,7 @@ async def _apply_gamerules():
         await asyncio.sleep(15 if attempt == 0 else 10)
         try:
             for rule in rules:
-                await rcon_pool.command(f"/{rule}")
+                await rcon_pool.command(f"/{rule}", BACKGROUND)
             print(
                 "[API] Gamerules applied (no mobs, no weather, no fire, fixed daylight)"
             )
@@ -116,6 +400,19 @@ async def _apply_gamerules():
     print("[API] Warning: Could not apply gamerules after 5 attempts")
 
 
+async def _prepare_world():
+    await _apply_gamerules()
+    try:
+        if await forceloads.reset():
+            print("[API] Cleared force-loaded chunks left from the last run")
+    except Exception as e:
+        print(f"[API] Forceload reset error: {e}")
+    try:
+        await _decorate_world()
+    except Exception as e:
+        print(f"[API] World decoration error: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
@@ -123,12 +420,26 @@ async def lifespan(app: FastAPI):
         await init_db()
     except Exception as e:
         print(f"[API] Warning: DB init failed: {e}")
+    cleanup_shared()
+    cleanup_sized_reset_templates()
     rcon_pool.init()
     task = asyncio.create_task(auto_disconnect_loop())
-    gamerule_task = asyncio.create_task(_apply_gamerules())
+    activity_task = asyncio.create_task(activity_flush_loop())
+    build_tasks = [
+        asyncio.create_task(build_stage_worker(stage))
+        for stage, workers in BUILD_STAGE_WORKERS.items() for _ in range(workers)
+    ]
+    gamerule_task = asyncio.create_task(_prepare_world())
     yield
     task.cancel()
+    activity_task.cancel()
+    for build_task in build_tasks:
+        build_task.cancel()
     gamerule_task.cancel()
+    try:
+        await _flush_activity()
+    except Exception as e:
+        print(f"[API] Activity flush error: {e}")
     rcon_pool.close()
     await close_pool()
 
@@ -332,6 +643,7 @@ async def _ensure_ephemeral_bot(agent: dict) -> Optional[str]:
             pass
         await execute("UPDATE agents SET bot_id = NULL WHERE identifier = $1",
                       (identifier, ))
+        _invalidate_agent(identifier)
 
     bot_count_row = await fetchone(
         "SELECT COUNT(*) as count FROM agents WHERE bot_id IS NOT NULL")
@@ -350,12 +662,13 @@ async def _ensure_ephemeral_bot(agent: dict) -> Optional[str]:
         bot_id = await _spawn_bot(bot_username)
         await execute("UPDATE agents SET bot_id = $1 WHERE identifier = $2",
                       (bot_id, identifier))
+        _invalidate_agent(identifier)
         await asyncio.sleep(2)
         await rcon_pool.command_safe(f"/gamemode creative {bot_username}",
-                                     "Set creative mode")
+                                     "Set creative mode", INTERACTIVE)
         await rcon_pool.command_safe(
             f"/effect give {bot_username} minecraft:speed 999999 1 true",
-            "Give speed 2")
+            "Give speed 2", INTERACTIVE)
         _schedule_bot_despawn(identifier)
         return bot_id
     except Exception:
@@ -391,6 +704,7 @@ async def _despawn_agent_bot(agent_identifier: str):
         await _despawn_bot(agent["bot_id"])
         await execute("UPDATE agents SET bot_id = NULL WHERE identifier = $1",
                       (agent_identifier, ))
+        _invalidate_agent(agent_identifier)
         print(f"[API] Despawned ephemeral bot for agent {agent_identifier}")
 
 
@@ -400,10 +714,57 @@ async def _get_oldest_idle_bot_agent() -> Optional[dict]:
     )
 
 
-async def _update_activity(identifier: str):
-    await execute(
-        "UPDATE agents SET last_active_at = NOW() WHERE identifier = $1",
-        (identifier, ))
+def _update_activity(identifier: str):
+    _pending_activity[identifier] = time.monotonic()
+
+
+async def _flush_activity():
+    if not _pending_activity:
+        return
+    pending = list(_pending_activity.items())
+    _pending_activity.clear()
+    now = time.monotonic()
+    try:
+        # Ages rather than timestamps keep the database clock authoritative.
+        await execute(
+            """
+            UPDATE agents SET last_active_at = NOW() - make_interval(secs => v.age)
+            FROM unnest($1::text[], $2::float8[]) AS v(identifier, age)
+            WHERE agents.identifier = v.identifier
+            """,
+            ([identifier for identifier, _ in pending],
+             [now - seen for _, seen in pending]),
+        )
+    except Exception:
+        for identifier, seen in pending:
+            _pending_activity.setdefault(identifier, seen)
+        raise
+
+
+async def activity_flush_loop():
+    while True:
+        await asyncio.sleep(ACTIVITY_FLUSH_INTERVAL)
+        try:
+            await _flush_activity()
+        except Exception as e:
+            print(f"[API] Activity flush error: {e}")
+
+
+def _invalidate_agent(identifier: str):
+    _agent_cache.pop(identifier, None)
+
+
+async def _get_agent(identifier: str) -> Optional[dict]:
+    now = time.monotonic()
+    cached = _agent_cache.get(identifier)
+    if cached and cached[0] > now:
+        return dict(cached[1])
+    agent = await fetchone("SELECT * FROM agents WHERE identifier = $1",
+                           (identifier, ))
+    if agent:
+        _agent_cache[identifier] = (now + AGENT_CACHE_TTL, agent)
+        return dict(agent)
+    return None
 
 
 # --- Auth ---
@@ -417,8 +778,7 @@ async def require_connected_agent(request: Request) -> dict:
             detail=
             "Missing X-Agent-Id header. Register first via POST /api/register")
 
-    agent = await fetchone("SELECT * FROM agents WHERE identifier = $1",
-                           (agent_id, ))
+    agent = await _get_agent(agent_id)
     if not agent:
         raise HTTPException(
             status_code=401,
@@ -430,7 +790,7 @@ async def require_connected_agent(request: Request) -> dict:
             status_code=403,
             detail="Not connected. Call POST /api/connect first.")
 
-    await _update_activity(agent["identifier"])
+    _update_activity(agent["identifier"])
     return agent
 
 
@@ -442,8 +802,7 @@ async def require_registered_agent(request: Request) -> dict:
             detail=
             "Missing X-Agent-Id header. Register first via POST /api/register")
 
-    agent = await fetchone("SELECT * FROM agents WHERE identifier = $1",
-                           (agent_id, ))
+    agent = await _get_agent(agent_id)
     if not agent:
         raise HTTPException(
             status_code=401,
@@ -509,6 +868,11 @@ def ns_build(project_id):
                "Execute your script in the world.")
 
 
+def ns_build_status(job_id):
+    return _ns("Check build", "GET", f"/api/builds/{job_id}",
+               "See how far your build has got and its result.")
+
+
 def ns_update(project_id):
     return _ns("Update script",
                "POST",
@@ -612,11 +976,7 @@ async def format_project(row: dict) -> dict:
     }
 
 
-async def format_project_summary(row: dict) -> dict:
-    creator_name = await _get_agent_display_name(row.get("agent_id", ""))
-    suggestion_count = await fetchone(
-        "SELECT COUNT(*) as count FROM suggestions WHERE project_id = $1",
-        (row["id"], ))
+def format_project_summary(row: dict) -> dict:
     return {
         "id":
         row["id"],
@@ -625,7 +985,7 @@ async def format_project_summary(row: dict) -> dict:
         "description":
         row["description"],
         "creator_name":
-        creator_name,
+        row["creator_name"],
         "grid": {
             "x": row["grid_x"],
             "z": row["grid_z"]
@@ -633,15 +993,62 @@ async def format_project_summary(row: dict) -> dict:
         "upvotes":
         row["upvotes"],
         "suggestion_count":
-        suggestion_count["count"] if suggestion_count else 0,
+        row["suggestion_count"],
         "created_at":
         row["created_at"].isoformat() if row.get("created_at") else None,
     }
 
 
-async def get_taken_plots() -> set:
-    rows = await fetchall("SELECT grid_x, grid_z FROM projects")
-    return {(r["grid_x"], r["grid_z"]) for r in rows}
+async def _fetch_project_summaries(page: str, params: tuple, page_order: str) -> list:
+    # The page is picked first so creator names and suggestion counts are only looked up
+    # for the rows returned, and the script column never leaves the database.
+    return await fetchall(
+        f"""
+        SELECT p.id, p.name, p.description, p.grid_x, p.grid_z, p.upvotes, p.created_at,
+               COALESCE(a.display_name, 'Unknown') AS creator_name,
+               (SELECT COUNT(*) FROM suggestions s WHERE s.project_id = p.id) AS suggestion_count
+        FROM ({page}) p
+        LEFT JOIN agents a ON a.identifier = p.agent_id
+        {page_order}
+        """,
+        params,
+    )
+
+
+async def get_project_total() -> int:
+    now = time.monotonic()
+    if _project_total_cache["value"] is None or now >= _project_total_cache["expires"]:
+        row = await fetchone("SELECT COUNT(*) as count FROM projects")
+        _project_total_cache["value"] = row["count"] if row else 0
+        _project_total_cache["expires"] = now + PROJECT_TOTAL_TTL
+    return _project_total_cache["value"]
+
+
+def _encode_project_cursor(sort: str, row: dict) -> str:
+    values = [row[k].isoformat() if k == "created_at" else row[k]
+              for k in PROJECT_CURSOR_KEYS[sort]]
+    raw = json.dumps([sort] + values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_project_cursor(sort: str, cursor: str) -> list:
+    keys = PROJECT_CURSOR_KEYS[sort]
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or raw[:1] != [sort] or len(raw) != len(keys) + 1:
+            raise ValueError(cursor)
+        values = [datetime.fromisoformat(v) if k == "created_at" else int(v)
+                  for k, v in zip(keys, raw[1:])]
+        # id and upvotes are INT columns and created_at is a naive TIMESTAMP; anything wider
+        # or offset-aware would fail in the query instead.
+        if any(isinstance(v, int) and not -2**31 <= v < 2**31 for v in values):
+            raise ValueError(cursor)
+        if any(isinstance(v, datetime) and v.tzinfo is not None for v in values):
+            raise ValueError(cursor)
+        return values
+    except (ValueError, TypeError, OverflowError):
+        raise HTTPException(status_code=400,
+                            detail="Invalid cursor — use next_cursor from a previous page with the same sort")
 
 
 # --- Auto-disconnect background task ---
@@ -651,6 +1058,7 @@ async def auto_disconnect_loop():
     while True:
         await asyncio.sleep(60)
         try:
+            await _flush_activity()
             stale = await fetchall(
                 "SELECT identifier, display_name FROM agents WHERE connected = true AND last_active_at < NOW() - make_interval(secs => $1)",
                 (IDLE_TIMEOUT_SECONDS, ),
@@ -661,6 +1069,7 @@ async def auto_disconnect_loop():
                     "UPDATE agents SET connected = false WHERE identifier = $1",
                     (agent["identifier"], ),
                 )
+                _invalidate_agent(agent["identifier"])
                 print(
                     f"[API] Auto-disconnected agent {agent['identifier']} ({agent['display_name']})"
                 )
@@ -1226,8 +1635,7 @@ async def _render_status_page():
     )
     bots_active = await get_active_bots_count()
     try:
-        projects_row = await fetchone("SELECT COUNT(*) as count FROM projects")
-        total_projects = projects_row["count"] if projects_row else 0
+        total_projects = await get_project_total()
     except Exception:
         total_projects = 0
     try:
@@ -1315,6 +1723,12 @@ async def api_status():
             "bots_active": bots_active,
             "max_players": MAX_PLAYERS,
             "api_version": API_VERSION,
+            "rcon": rcon_pool.stats(),
+            "forceload": forceloads.stats(),
+            "builds": {
+                "active": len(_active_builds),
+                "waiting": {stage: queue.qsize() for stage, queue in build_stages.items()},
+            },
         },
         headers={"Cache-Control": "no-cache, no-store, must-revalidate"},
     )
@@ -1367,6 +1781,8 @@ async def connect_agent(request: Request):
         "UPDATE agents SET connected = true, last_active_at = NOW() WHERE identifier = $1",
         (agent["identifier"], ),
     )
+    _invalidate_agent(agent["identifier"])
+    _pending_activity.pop(agent["identifier"], None)
 
     inbox = await _get_inbox_summary(agent["identifier"])
     unread = inbox["unread_count"]
@@ -1642,26 +2058,21 @@ async def create_project(body: CreateProjectRequest, request: Request):
             status_code=400,
             detail=f"Script must be {MAX_SCRIPT_LENGTH} characters or less")
 
-    for attempt in range(5):
-        taken = await get_taken_plots()
-        grid_x, grid_z = get_next_grid_coords(taken)
-        try:
-            await execute(
-                "INSERT INTO projects (name, description, script, agent_id, grid_x, grid_z) VALUES ($1, $2, $3, $4, $5, $6)",
-                (body.name.strip(), body.description.strip(), body.script,
-                 agent["identifier"], grid_x, grid_z),
+    # The allocator row lock serializes concurrent creates for the length of this short
+    # transaction; a slot that is somehow already taken is skipped, not retried.
+    async with transaction() as conn:
+        project = None
+        while project is None:
+            index = await conn.fetchval(
+                "UPDATE plot_allocator SET next_index = next_index + 1 WHERE id = 1 RETURNING next_index - 1"
             )
-            break
-        except asyncpg.exceptions.UniqueViolationError:
-            if attempt == 4:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Could not assign a plot — please try again")
-            continue
-
-    project = await fetchone(
-        "SELECT * FROM projects WHERE grid_x = $1 AND grid_z = $2",
-        (grid_x, grid_z))
+            grid_x, grid_z = spiral_coords(index)
+            project = await conn.fetchrow(
+                "INSERT INTO projects (name, description, script, agent_id, grid_x, grid_z) VALUES ($1, $2, $3, $4, $5, $6) ON CONFLICT (grid_x, grid_z) DO NOTHING RETURNING *",
+                body.name.strip(), body.description.strip(), body.script,
+                agent["identifier"], grid_x, grid_z)
+    project = dict(project)
+    _project_total_cache["expires"] = 0.0
 
     world_pos = grid_to_world(grid_x, grid_z)
     bot_id = await _ensure_ephemeral_bot(agent)
@@ -1670,9 +2081,7 @@ async def create_project(body: CreateProjectRequest, request: Request):
                            world_pos["z"])
         _schedule_bot_despawn(agent["identifier"])
 
-    deco_cmds = get_decoration_commands(grid_x, grid_z)
-    for cmd in deco_cmds:
-        await rcon_pool.command_safe(cmd, "Decoration")
+    await _decorate_plots([(grid_x, grid_z)])
 
     print(
         f"[API] Project '{body.name}' created at grid ({grid_x}, {grid_z}) by {agent['identifier']}"
@@ -1688,19 +2097,45 @@ async def create_project(body: CreateProjectRequest, request: Request):
 @app.get("/api/projects")
 async def list_projects(sort: str = "newest",
                         limit: int = 20,
-                        offset: int = 0):
-    if sort == "top":
-        order = "upvotes DESC, created_at DESC"
-    elif sort == "random":
-        order = "RANDOM()"
+                        offset: int = 0,
+                        cursor: Optional[str] = None):
+    limit = max(1, min(limit, 50))
+    if sort == "random":
+        # A window starting at a random point of the indexed rand_key column (wrapping
+        # around the end) instead of sorting the whole table by RANDOM().
+        page = f"""
+            (SELECT {PROJECT_COLUMNS} FROM projects WHERE rand_key >= $2 ORDER BY rand_key LIMIT $1)
+            UNION ALL
+            (SELECT {PROJECT_COLUMNS} FROM projects WHERE rand_key < $2 ORDER BY rand_key LIMIT $1)
+            LIMIT $1
+        """
+        params = (limit, random.random())
+        page_order = ""
     else:
-        order = "created_at DESC"
-
-    rows = await fetchall(
-        f"SELECT * FROM projects ORDER BY {order} LIMIT $1 OFFSET $2",
-        (min(limit, 50), offset),
-    )
-    total = await fetchone("SELECT COUNT(*) as count FROM projects")
+        if sort != "top":
+            sort = "newest"
+        keys = PROJECT_CURSOR_KEYS[sort]
+        order = ", ".join(f"{k} DESC" for k in keys)
+        if cursor:
+            values = _decode_project_cursor(sort, cursor)
+            placeholders = ", ".join(f"${i + 2}" for i in range(len(keys)))
+            page = f"""
+                SELECT {PROJECT_COLUMNS} FROM projects
+                WHERE ({", ".join(keys)}) < ({placeholders})
+                ORDER BY {order} LIMIT $1
+            """
+            params = (limit, *values)
+        else:
+            page = f"SELECT {PROJECT_COLUMNS} FROM projects ORDER BY {order} LIMIT $1 OFFSET $2"
+            params = (limit, max(offset, 0))
+        page_order = "ORDER BY " + ", ".join(f"p.{k} DESC" for k in keys)
+
+    rows = await _fetch_project_summaries(page, params, page_order)
+    if sort == "random":
+        random.shuffle(rows)
+        next_cursor = None
+    else:
+        next_cursor = _encode_project_cursor(sort, rows[-1]) if len(rows) == limit else None
 
     next_steps = [
         _ns("Visit a project", "POST", "/api/projects/{id}/visit",
@@ -1709,18 +2144,58 @@ async def list_projects(sort: str = "newest",
         ns_send_chat(),
         ns_read_chat(),
     ]
-
-    summaries = []
-    for r in rows:
-        summaries.append(await format_project_summary(r))
+    if next_cursor:
+        next_steps.insert(0, _ns("Next page", "GET",
+                                 f"/api/projects?sort={sort}&limit={limit}&cursor={next_cursor}",
+                                 "Load the next page of projects."))
 
     return {
-        "projects": summaries,
-        "total": total["count"] if total else 0,
+        "projects": [format_project_summary(r) for r in rows],
+        "total": await get_project_total(),
+        "next_cursor": next_cursor,
         "next_steps": next_steps,
     }
 
 
+@app.get("/api/projects/nearby")
+async def nearby_projects(x: int, z: int, radius: int = 2, limit: int = 20):
+    radius = max(0, min(radius, NEARBY_MAX_RADIUS))
+    limit = max(1, min(limit, 50))
+    here = world_to_grid(x, z)
+    grid_x, grid_z = here or nearest_grid(x, z)
+
+    # A box over the (grid_x, grid_z) unique index; only rows inside it are read.
+    page = f"""
+        SELECT {PROJECT_COLUMNS} FROM projects
+        WHERE grid_x BETWEEN $2 AND $3 AND grid_z BETWEEN $4 AND $5
+        ORDER BY GREATEST(ABS(grid_x - $6), ABS(grid_z - $7)), id
+        LIMIT $1
+    """
+    rows = await _fetch_project_summaries(
+        page,
+        (limit, grid_x - radius, grid_x + radius, grid_z - radius, grid_z + radius,
+         grid_x, grid_z),
+        "ORDER BY GREATEST(ABS(p.grid_x - $6), ABS(p.grid_z - $7)), p.id",
+    )
+
+    projects = []
+    for r in rows:
+        summary = format_project_summary(r)
+        summary["distance"] = grid_distance(grid_x, grid_z, r["grid_x"], r["grid_z"])
+        projects.append(summary)
+    return {
+        "plot": {"x": here[0], "z": here[1]} if here else None,
+        "center": {"x": grid_x, "z": grid_z},
+        "radius": radius,
+        "projects": projects,
+        "next_steps": [
+            _ns("Visit a project", "POST", "/api/projects/{id}/visit",
+                "See a project up close."),
+            ns_browse(),
+        ],
+    }
+
+
 # --- Visit ---
 
 
@@ -1777,6 +2252,9 @@ async def visit_project(project_id: int, request: Request):
             ns_vote(project_id),
             ns_inbox(),
             ns_browse(),
+            _ns("Nearby projects", "GET",
+                f"/api/projects/nearby?x={world_pos['x']}&z={world_pos['z']}",
+                "See what else is built around this plot."),
             ns_send_chat(),
             ns_read_chat(),
         ],
@@ -1831,7 +2309,7 @@ async def update_project(project_id: int, body: UpdateProjectRequest,
 # --- Build ---
 
 
-@app.post("/api/projects/{project_id}/build")
+@app.post("/api/projects/{project_id}/build", status_code=202)
 async def build_project(project_id: int, request: Request):
     agent = await require_connected_agent(request)
 
@@ -1847,7 +2325,6 @@ async def build_project(project_id: int, request: Request):
         raise HTTPException(status_code=400,
                             detail="Project has no script to build")
 
-    from datetime import datetime, timezone
     now = datetime.now(timezone.utc)
     if project["last_built_at"]:
         last_built = project["last_built_at"]
@@ -1860,6 +2337,105 @@ async def build_project(project_id: int, request: Request):
                 status_code=429,
                 detail=f"Build cooldown: wait {remaining} more seconds")
 
+    # Retries while a build is queued or running get the same job back.
+    active = _active_builds.get(project_id)
+    if active:
+        job = build_jobs[active]
+        return {
+            **format_build_job(job),
+            "message": f"'{project['name']}' is already being built ({job['phase']}). Poll the job for progress.",
+            "next_steps": [ns_build_status(job["id"])] + standard_next_steps(),
+        }
+
+    job = new_build_job(project_id, agent["identifier"])
+    try:
+        build_queue.put_nowait(job)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503,
+                            detail="Build queue is full — try again in a minute")
+    build_jobs[job["id"]] = job
+    _active_builds[project_id] = job["id"]
+    print(f"[BUILD {project_id}] Job {job['id']} queued ({build_queue.qsize()} waiting)")
+
+    return {
+        **format_build_job(job),
+        "message":
+        f"Build of '{project['name']}' queued. Poll the job to see its progress and result.",
+        "next_steps": [ns_build_status(job["id"])] + standard_next_steps(),
+    }
+
+
+@app.get("/api/builds/{job_id}")
+async def get_build_job(job_id: str, request: Request):
+    agent = await require_connected_agent(request)
+    job = build_jobs.get(job_id)
+    if not job or job["agent_id"] != agent["identifier"]:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Build job not found — finished jobs are kept for {BUILD_JOB_TTL // 60} minutes")
+
+    if job["result"] is not None:
+        return {
+            **format_build_job(job),
+            "message": job["result"]["message"],
+            "next_steps": job["result"]["next_steps"],
+        }
+    return {
+        **format_build_job(job),
+        "message": f"Build is {job['phase'].replace('_', ' ')}.",
+        "next_steps": [ns_build_status(job_id)] + standard_next_steps(),
+    }
+
+
+async def build_stage_worker(stage: str):
+    inbox = build_stages[stage]
+    while True:
+        job = await inbox.get()
+        project_id = job["project_id"]
+        if job["started_at"] is None:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            outcome = await BUILD_STEPS[stage](job)
+        except Exception as e:
+            print(f"[BUILD {project_id}] Job {job['id']} crashed in {stage}: {e}")
+            outcome = {
+                "success": False,
+                "error": f"Internal build error: {e}",
+                "message": "Something went wrong on our side while building. Please try building again.",
+                "next_steps": [ns_build(project_id)] + standard_next_steps(),
+            }
+        inbox.task_done()
+        # A step hands the job on by naming the next stage, or finishes it with a result.
+        if isinstance(outcome, str):
+            _set_build_phase(job, f"waiting_to_{outcome}")
+            await build_stages[outcome].put(job)
+            continue
+        discard_shared(job["build"].pop("blocks", None))
+        job["build"] = None
+        job["result"] = outcome
+        job["status"] = "succeeded" if outcome["success"] else "failed"
+        job["phase"] = "done"
+        job["finished_at"] = time.time()
+        _active_builds.pop(project_id, None)
+        _prune_build_jobs()
+
+
+async def _prepare_build(job: dict):
+    project_id = job["project_id"]
+    # Both are read again here: an earlier job may have changed placed_* or bot_id.
+    project = await fetchone("SELECT * FROM projects WHERE id = $1",
+                             (project_id, ))
+    agent = await _get_agent(job["agent_id"])
+    if not project or not agent:
+        return {
+            "success": False,
+            "error": "Project or agent no longer exists",
+            "message": "This build could not run because the project or your account is gone.",
+            "next_steps": standard_next_steps(),
+        }
+
+    _set_build_phase(job, "walking")
     world_pos = grid_to_world(project["grid_x"], project["grid_z"])
     bot_id = await _ensure_ephemeral_bot(agent)
     if bot_id:
@@ -1867,12 +2443,37 @@ async def build_project(project_id: int, request: Request):
                            world_pos["z"])
         _schedule_bot_despawn(agent["identifier"])
 
+    world_id = _current_world_id()
+    if not world_id or project.get("placed_world") != world_id:
+        # Recorded against another world (restored from a backup or regenerated):
+        # the plot's contents are unknown, so it gets a full reset and no diff.
+        project["placed_box"] = project["placed_stem"] = None
+
     buildable = get_plot_bounds(project["grid_x"], project["grid_z"])
     build_origin = get_buildable_origin(project["grid_x"], project["grid_z"])
+    build = job["build"] = {
+        "project": project,
+        "buildable": buildable,
+        "origin": build_origin,
+        # Only diff against the last structure if it is known to still be in the world.
+        "placed_stem": project.get("placed_stem") if project.get("placed_box") else None,
+        "cache_key": structure_cache.cache_key(project["script"], build_origin, buildable),
+    }
 
-    sandbox_result = await run_build_script(project["script"], build_origin,
-                                            buildable)
-
+    cached = await lookup_cached_build(project_id, build["cache_key"])
+    if cached:
+        stem = cached.get("stem") or structure_stem(project_id, build["cache_key"])
+        build.update(stem=stem, pieces=cached["pieces"], bounds=cached["bounds"],
+                     block_count=cached["block_count"])
+        build["diff"] = await diff_cached_build(
+            project_id, build["placed_stem"], stem,
+            build_origin) if build["placed_stem"] else None
+        print(f"[BUILD {project_id}] Cache hit: {stem}, pieces={len(cached['pieces'])}, blocks={cached['block_count']}")
+        return "place"
+
+    _set_build_phase(job, "running_script")
+    sandbox_result = await run_build_script(project["script"],
+                                            build_origin, buildable)
     if not sandbox_result["success"]:
         return {
             "success": False,
@@ -1882,86 +2483,169 @@ async def build_project(project_id: int, request: Request):
             f"Build failed — there's an error in your script: {sandbox_result['error']}. Fix the script and try again.",
             "next_steps": [ns_update(project_id)] + standard_next_steps(),
         }
+    build["blocks"] = sandbox_result["blocks"]
+    build["block_count"] = sandbox_result["block_count"]
+    build["bounds"] = sandbox_result["blocks"]["bounds"]
+    return "encode"
 
+
+async def _encode_build_job(job: dict):
+    project_id = job["project_id"]
+    build = job["build"]
+    _set_build_phase(job, "encoding", block_count=build["block_count"])
+    try:
+        built = await encode_build(build["blocks"], project_id, build["cache_key"],
+                                   build["block_count"], build["origin"],
+                                   build["placed_stem"])
+    finally:
+        discard_shared(build.pop("blocks"))
+    build.update(stem=built["stem"], pieces=built["pieces"], diff=built["diff"])
+    print(f"[BUILD {project_id}] Structure NBT: {built['stem']}, pieces={len(built['pieces'])}, blocks={build['block_count']}, cacheable={build['cache_key'] is not None}")
+    return "place"
+
+
+async def _place_build(job: dict) -> dict:
+    project_id = job["project_id"]
+    build = job["build"]
+    project = build["project"]
+    buildable = build["buildable"]
+    build_origin = build["origin"]
+    placed_stem = build["placed_stem"]
+    stem = build["stem"]
+    structure_pieces = build["pieces"]
+    structure_bounds = build["bounds"]
+    block_count = build["block_count"]
+    diff = build["diff"]
+
+    _set_build_phase(job, "waiting_for_plot")
     plot_lock = _get_plot_lock(project["grid_x"], project["grid_z"])
     async with plot_lock:
+        _set_build_phase(job, "loading_chunks")
         await execute(
             "UPDATE projects SET last_built_at = NOW() WHERE id = $1",
             (project_id, ))
 
         print(f"[BUILD {project_id}] '{project['name']}' grid=({project['grid_x']},{project['grid_z']}) bounds=({buildable['x1']},{buildable['z1']})->({buildable['x2']},{buildable['z2']}) origin=({build_origin['x']},{build_origin['y']},{build_origin['z']})")
-        print(f"[BUILD {project_id}] Sandbox: {sandbox_result['block_count']} blocks, success={sandbox_result['success']}")
+        print(f"[BUILD {project_id}] Blocks: {block_count}")
 
-        forceload_add = f"/forceload add {buildable['x1']} {buildable['z1']} {buildable['x2']} {buildable['z2']}"
-        fl_result = await rcon_pool.command(forceload_add)
-        print(f"[BUILD {project_id}] Forceload: {fl_result!r}")
-        if fl_result and "error" in fl_result.lower():
-            print(f"[BUILD {project_id}] WARNING: forceload failed!")
-        await asyncio.sleep(2.0)
+        # Hot plots stay force-loaded between builds; a cold one waits until its chunks are in.
+        loaded_before = forceloads.loads
+        if not await forceloads.acquire(buildable):
+            print(f"[BUILD {project_id}] WARNING: plot chunks not loaded after {FORCELOAD_READY_TIMEOUT:.0f}s")
+        elif forceloads.loads == loaded_before:
+            print(f"[BUILD {project_id}] Chunks already loaded")
 
         place_failed = False
         try:
-            reset_name = generate_reset_nbt()
-            reset_cmd = f"/place template {reset_name} {buildable['x1']} {GROUND_Y} {buildable['z1']}"
-            print(f"[BUILD {project_id}] Reset cmd: {reset_cmd}")
-            reset_result = await rcon_pool.command(reset_cmd)
-            print(f"[BUILD {project_id}] Reset result: {reset_result!r}")
-            if reset_result and ("failed" in reset_result.lower() or "couldn't" in reset_result.lower()):
-                print(f"[BUILD {project_id}] WARNING: Plot reset FAILED")
-
-            await asyncio.sleep(0.5)
-
-            deco_cmds = get_decoration_commands(project["grid_x"],
-                                                project["grid_z"])
-            deco_executed, deco_errors = await rcon_pool.batch(deco_cmds, "Build decoration")
-            print(f"[BUILD {project_id}] Decoration: {deco_executed}/{len(deco_cmds)} commands, errors={deco_errors}")
-
-            structure_name = blocks_to_nbt(sandbox_result["blocks"], project_id)
-            print(f"[BUILD {project_id}] Structure NBT: {structure_name}, blocks={sandbox_result['block_count']}")
-            if structure_name:
-                offset = get_structure_offset(sandbox_result["blocks"],
-                                              build_origin)
-                place_cmd = f"/place template {structure_name} {offset[0]} {offset[1]} {offset[2]}"
-                print(f"[BUILD {project_id}] Place cmd: {place_cmd}")
+            # placed_box: NULL = unknown contents, [] = known empty, else the world box of the last structure.
+            # placed_stem names the structure whose block set is in that box; both hold only
+            # while placed_world matches the current world id.
+            await execute(
+                "UPDATE projects SET placed_box = NULL, placed_stem = NULL WHERE id = $1",
+                (project_id, ))
+            reset_commands = 0
+            deco_commands = 0
+            _set_build_phase(job, "resetting")
+            if diff is not None:
+                print(f"[BUILD {project_id}] Incremental: {diff['count']} blocks changed since {placed_stem}")
+                place_pieces = diff["pieces"]
+            else:
+                placed_box = project.get("placed_box")
+                if project["last_built_at"] is None or placed_box == []:
+                    print(f"[BUILD {project_id}] Reset skipped: plot known empty")
+                else:
+                    reset_fills = get_reset_commands(buildable, placed_box) if placed_box else None
+                    if reset_fills:
+                        # Known box: tiled fills, paced like structure pieces so a tall build's
+                        # reset never lands in a single tick.
+                        print(f"[BUILD {project_id}] Reset: {len(reset_fills)} fills over {placed_box}")
+                        pacing_deadline = time.monotonic() + PLACE_MAX_PACING
+                        for i, reset_cmd in enumerate(reset_fills):
+                            if i:
+                                await _pace_placement(project_id, pacing_deadline)
+                            reset_result = await rcon_pool.command(reset_cmd)
+                            reset_commands += 1
+                            if reset_result and _fill_failed(reset_result):
+                                print(f"[BUILD {project_id}] WARNING: Plot reset fill FAILED: {reset_result!r}")
+                    else:
+                        reset_name = await prepare_reset_template()
+                        reset_cmd = f"/place template {reset_name} {buildable['x1']} {GROUND_Y} {buildable['z1']}"
+                        print(f"[BUILD {project_id}] Reset cmd: {reset_cmd}")
+                        reset_result = await rcon_pool.command(reset_cmd)
+                        reset_commands = 1
+                        print(f"[BUILD {project_id}] Reset result: {reset_result!r}")
+                        if reset_result and ("failed" in reset_result.lower() or "couldn't" in reset_result.lower()):
+                            print(f"[BUILD {project_id}] WARNING: Plot reset FAILED")
+
+                    await asyncio.sleep(0.5)
+
+                # The reset restores the floor; only plots decorated before this was tracked need more.
+                deco_commands = await _decorate_plots([(project["grid_x"], project["grid_z"])],
+                                                      "Build decoration")
+                if deco_commands:
+                    print(f"[BUILD {project_id}] Decoration: {deco_commands} commands")
+                place_pieces = structure_pieces
+
+            commands_executed = reset_commands + deco_commands
+            _set_build_phase(job, "placing", pieces_placed=0, pieces_total=len(place_pieces))
+            pacing_deadline = time.monotonic() + PLACE_MAX_PACING
+            for i, piece in enumerate(place_pieces):
+                if i:
+                    await _pace_placement(project_id, pacing_deadline)
+                offset = get_structure_offset(piece["bounds"], build_origin)
+                place_cmd = f"/place template {piece['structure']} {offset[0]} {offset[1]} {offset[2]}"
+                print(f"[BUILD {project_id}] Place cmd ({i + 1}/{len(place_pieces)}): {place_cmd}")
                 result = await rcon_pool.command(place_cmd)
+                commands_executed += 1
+                job["progress"]["pieces_placed"] = i + 1
                 print(f"[BUILD {project_id}] Place result: {result!r}")
                 result_lower = result.lower() if result else ""
                 if "failed" in result_lower or "invalid" in result_lower or "couldn't" in result_lower or "out of this world" in result_lower:
                     print(f"[BUILD {project_id}] ERROR: /place template FAILED: {result}")
                     place_failed = True
-                else:
-                    print(f"[BUILD {project_id}] Place SUCCESS")
-                commands_executed = 1 + len(deco_cmds) + 1
-            else:
-                print(f"[BUILD {project_id}] No solid blocks — nothing to place")
-                commands_executed = 1 + len(deco_cmds)
+                    break
+            if not place_pieces:
+                print(f"[BUILD {project_id}] Nothing to place")
+            elif not place_failed:
+                print(f"[BUILD {project_id}] Place SUCCESS")
+            if not place_failed:
+                await execute(
+                    "UPDATE projects SET placed_box = $1, placed_stem = $2, placed_world = $3 WHERE id = $4",
+                    (_structure_world_box(structure_bounds, build_origin),
+                     stem, _current_world_id(), project_id))
         finally:
-            forceload_remove = f"/forceload remove {buildable['x1']} {buildable['z1']} {buildable['x2']} {buildable['z2']}"
-            await rcon_pool.command(forceload_remove)
+            forceloads.release(buildable)
 
     if place_failed:
         print(f"[API] Project {project_id} build FAILED during placement")
         return {
             "success": False,
             "error": "Structure placement failed in the Minecraft world. Try building again.",
-            "block_count": sandbox_result["block_count"],
+            "block_count": block_count,
             "message": "Your script ran correctly but the structure couldn't be placed in the world. Please try building again.",
-            "next_steps": [{"action": f"POST /api/projects/{project_id}/build", "description": "Retry the build"}] + standard_next_steps(),
+            "next_steps": [ns_build(project_id)] + standard_next_steps(),
         }
 
     print(
-        f"[API] Project {project_id} built: {commands_executed} commands, {sandbox_result['block_count']} blocks"
+        f"[API] Project {project_id} built: {commands_executed} commands, {block_count} blocks"
     )
     return {
         "success": True,
         "commands_executed": commands_executed,
-        "block_count": sandbox_result["block_count"],
+        "block_count": block_count,
         "message":
-        f"Built '{project['name']}' — {sandbox_result['block_count']} blocks placed.",
+        f"Built '{project['name']}' — {block_count} blocks placed.",
         "next_steps": [ns_update(project_id)] + standard_next_steps(),
     }
 
 
+BUILD_STEPS = {
+    "prepare": _prepare_build,
+    "encode": _encode_build_job,
+    "place": _place_build,
+}
+
+
 # --- Suggest ---
 
 
@@ -2094,7 +2778,7 @@ async def chat_send(body: ChatSendRequest, request: Request):
             cmd = f"/tell {safe_target} [{sanitize_rcon(agent['display_name'])}] {sanitize_rcon(safe_message)}"
         else:
             cmd = f"/say [{sanitize_rcon(agent['display_name'])}] {sanitize_rcon(safe_message)}"
-        result = await rcon_pool.command(cmd)
+        result = await rcon_pool.command(cmd, INTERACTIVE)
         print(f"[API] RCON chat: {cmd}")
         return {
             "success":
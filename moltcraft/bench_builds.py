@@ -0,0 +1,190 @@
+import sys
+import os
+import time
+import shutil
+import asyncio
+import argparse
+import secrets
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Structures and the world id go to a scratch directory, never the real world.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="moltcraft-bench-")
+os.environ["MOLTCRAFT_STRUCTURE_DIR"] = os.path.join(SCRATCH_DIR, "structures")
+
+import asyncpg
+
+import db
+from fake_rcon import FakeRconServer
+from grid import spiral_coords
+
+# Builds/minute with N agents each rebuilding their project in a loop, through the staged
+# build pipeline and then with whole-build workers that run the stages back to back (how
+# builds ran before). Uses a throwaway schema in DATABASE_URL and the fake RCON server.
+#
+#   DATABASE_URL=postgres://... python moltcraft/bench_builds.py --agents 8 --rounds 5
+
+SCRIPT = """
+for y in range({height}):
+    build.fill(-{radius}, y, -{radius}, {radius}, y, {radius}, "stone_bricks")
+    build.fill(1 - {radius}, y, 1 - {radius}, {radius} - 1, y, {radius} - 1, "air")
+for i in range({blocks}):
+    build.setblock(i % 61 - 30, {height} + i // 3721, (i // 61) % 61 - 30, "glass")
+# {tag}
+"""
+
+
+async def seed(conn, agents: int) -> list[tuple[int, str]]:
+    agent_ids = [f"bench-{i}" for i in range(agents)]
+    await conn.copy_records_to_table(
+        "agents", records=[(a, f"Agent {i}", True) for i, a in enumerate(agent_ids)],
+        columns=["identifier", "display_name", "connected"])
+    await conn.copy_records_to_table(
+        "projects",
+        records=[(f"Project {i}", "benchmark build", "", a, *spiral_coords(i))
+                 for i, a in enumerate(agent_ids)],
+        columns=["name", "description", "script", "agent_id", "grid_x", "grid_z"])
+    rows = await conn.fetch("SELECT id, agent_id FROM projects ORDER BY id")
+    return [(r["id"], r["agent_id"]) for r in rows]
+
+
+def _overlap(busy: list[tuple[float, float, str]], wall: float) -> float:
+    # Share of the wall time during which at least two different stages were working.
+    events = sorted([(start, 1, stage) for start, _, stage in busy] +
+                    [(end, -1, stage) for _, end, stage in busy])
+    active = {}
+    overlapped = 0.0
+    last = events[0][0] if events else 0.0
+    for at, delta, stage in events:
+        if sum(1 for n in active.values() if n) >= 2:
+            overlapped += at - last
+        active[stage] = active.get(stage, 0) + delta
+        last = at
+    return overlapped / wall if wall else 0.0
+
+
+async def _run(api, mode: str, projects, args) -> None:
+    busy = []
+    steps = dict(api.BUILD_STEPS)
+
+    def timed(stage, step):
+        async def run(job):
+            started = time.perf_counter()
+            try:
+                return await step(job)
+            finally:
+                busy.append((started, time.perf_counter(), stage))
+        return run
+
+    for stage, step in steps.items():
+        api.BUILD_STEPS[stage] = timed(stage, step)
+
+    whole_builds = asyncio.Semaphore(args.workers)
+
+    async def whole_build(job):
+        async with whole_builds:
+            stage = "prepare"
+            try:
+                while isinstance(stage, str):
+                    stage = await api.BUILD_STEPS[stage](job)
+            except Exception as e:
+                stage = {"success": False, "error": str(e)}
+            api.discard_shared(job["build"].pop("blocks", None))
+            job["result"] = stage
+
+    async def pipelined_build(job):
+        await api.build_queue.put(job)
+        api._active_builds[job["project_id"]] = job["id"]
+        while job["finished_at"] is None:
+            await asyncio.sleep(0.02)
+
+    failures = []
+
+    async def agent_loop(project_id, agent_id):
+        for round_ in range(args.rounds):
+            # A new script every round, like an agent iterating on its build.
+            await db.execute("UPDATE projects SET script = $1 WHERE id = $2", (SCRIPT.format(
+                height=args.height, radius=args.radius, blocks=args.blocks,
+                tag=f"{mode} {round_}"), project_id))
+            job = api.new_build_job(project_id, agent_id)
+            await (pipelined_build(job) if mode == "pipeline" else whole_build(job))
+            if not job["result"]["success"]:
+                failures.append(job["result"].get("error"))
+
+    workers = []
+    if mode == "pipeline":
+        workers = [asyncio.create_task(api.build_stage_worker(stage))
+                   for stage, count in api.BUILD_STAGE_WORKERS.items() for _ in range(count)]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(agent_loop(p, a) for p, a in projects))
+    finally:
+        for task in workers:
+            task.cancel()
+        api.BUILD_STEPS.update(steps)
+    wall = time.perf_counter() - started
+
+    builds = len(projects) * args.rounds
+    per_stage = {stage: sum(end - start for start, end, s in busy if s == stage) for stage in steps}
+    print(f"[BENCH] {mode:<8} {builds} builds in {wall:6.1f}s = {builds / wall * 60:6.1f} builds/min, "
+          f"stages overlapping {_overlap(busy, wall) * 100:3.0f}% of the time, failures={len(failures)}")
+    print("[BENCH]          busy " + ", ".join(f"{s}={t:.1f}s" for s, t in per_stage.items()))
+    if failures:
+        print(f"[BENCH]          first failure: {failures[0]}")
+
+
+async def main(args):
+    import api
+
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        raise SystemExit("DATABASE_URL environment variable not set")
+    server = await FakeRconServer(port=0, latency=args.latency_ms / 1000).start()
+    api.rcon_pool = api.RconPool(size=4, host=server.host, port=server.port,
+                                 password=server.password)
+    api.forceloads = api.ForceloadCache(api.rcon_pool)
+    api.WORLD_DIR = api.Path(SCRATCH_DIR)
+
+    # No bot manager here; builds go straight to the script.
+    async def no_bot(agent):
+        return None
+
+    api._ensure_ephemeral_bot = no_bot
+
+    schema = f"bench_{secrets.token_hex(4)}"
+    admin = await asyncpg.connect(database_url)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    try:
+        db.pool = await asyncpg.create_pool(database_url, server_settings={"search_path": schema})
+        await db.init_db()
+        api.rcon_pool.init()
+        async with db.pool.acquire() as conn:
+            projects = await seed(conn, args.agents)
+        print(f"[BENCH] {args.agents} agents x {args.rounds} builds, "
+              f"stage workers {api.BUILD_STAGE_WORKERS}, whole-build workers {args.workers}")
+        for mode in ("pipeline", "serial"):
+            await db.execute("UPDATE projects SET placed_box = NULL, placed_stem = NULL, last_built_at = NULL")
+            await _run(api, mode, projects, args)
+    finally:
+        api.rcon_pool.close()
+        if db.pool:
+            await db.close_pool()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+        await server.close()
+        api.process_pool.shutdown(cancel_futures=True)
+        api.encode_pool.shutdown(cancel_futures=True)
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark build throughput with concurrent agents")
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="builds per agent")
+    parser.add_argument("--workers", type=int, default=2, help="whole-build workers for the serial run")
+    parser.add_argument("--blocks", type=int, default=20000, help="extra blocks per script")
+    parser.add_argument("--height", type=int, default=40)
+    parser.add_argument("--radius", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="fake RCON per-command time")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+import secrets
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncpg
+
+import db
+
+# Seeds a throwaway schema in DATABASE_URL and times project browsing against it.
+#
+#   DATABASE_URL=postgres://... python moltcraft/bench_projects.py --projects 20000
+
+
+async def seed(conn, projects: int, agents: int, suggestions: int):
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    agent_ids = [f"bench-{i}" for i in range(agents)]
+    await conn.copy_records_to_table(
+        "agents", records=[(a, f"Agent {i}") for i, a in enumerate(agent_ids)],
+        columns=["identifier", "display_name"])
+    side = int(projects ** 0.5) + 1
+    await conn.copy_records_to_table(
+        "projects",
+        records=[(f"Project {i}", "benchmark project", "x" * rng.randint(200, 50000),
+                  rng.choice(agent_ids), i % side, i // side, rng.randint(0, 200),
+                  now - timedelta(seconds=projects - i))
+                 for i in range(projects)],
+        columns=["name", "description", "script", "agent_id", "grid_x", "grid_z",
+                 "upvotes", "created_at"])
+    ids = [r["id"] for r in await conn.fetch("SELECT id FROM projects")]
+    await conn.copy_records_to_table(
+        "suggestions",
+        records=[(rng.choice(ids), "make it taller", rng.choice(agent_ids))
+                 for _ in range(suggestions)],
+        columns=["project_id", "suggestion", "agent_id"])
+    await conn.execute("ANALYZE")
+
+
+async def _list_projects_n_plus_one(sort: str, limit: int, offset: int):
+    # The listing as it was: one query for the page, then two more per row.
+    order = {"top": "upvotes DESC, created_at DESC", "random": "RANDOM()"}.get(sort, "created_at DESC")
+    rows = await db.fetchall(f"SELECT * FROM projects ORDER BY {order} LIMIT $1 OFFSET $2",
+                             (limit, offset))
+    await db.fetchone("SELECT COUNT(*) as count FROM projects")
+    for row in rows:
+        await db.fetchone("SELECT display_name FROM agents WHERE identifier = $1", (row["agent_id"], ))
+        await db.fetchone("SELECT COUNT(*) as count FROM suggestions WHERE project_id = $1", (row["id"], ))
+    return rows
+
+
+async def _time(label: str, fn, runs: int):
+    await fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    print(f"[BENCH] {label:<28} p50={samples[len(samples) // 2] * 1000:7.2f}ms "
+          f"p95={samples[int(len(samples) * 0.95)] * 1000:7.2f}ms")
+
+
+async def main(args):
+    from api import list_projects, get_project_total
+
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        raise SystemExit("DATABASE_URL environment variable not set")
+    schema = f"bench_{secrets.token_hex(4)}"
+    admin = await asyncpg.connect(database_url)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    try:
+        db.pool = await asyncpg.create_pool(database_url, server_settings={"search_path": schema})
+        await db.init_db()
+        async with db.pool.acquire() as conn:
+            started = time.perf_counter()
+            await seed(conn, args.projects, args.agents, args.suggestions)
+            print(f"[BENCH] Seeded {args.projects} projects, {args.suggestions} suggestions "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+        for sort in ("newest", "top", "random"):
+            for offset in (0, args.projects // 2):
+                if sort == "random" and offset:
+                    continue
+                await _time(f"before {sort} offset={offset}",
+                            lambda: _list_projects_n_plus_one(sort, args.limit, offset), args.runs)
+                await _time(f"after  {sort} offset={offset}",
+                            lambda: list_projects(sort=sort, limit=args.limit, offset=offset), args.runs)
+                if offset and sort != "random":
+                    page = await list_projects(sort=sort, limit=args.limit, offset=offset - args.limit)
+                    cursor = page["next_cursor"]
+                    await _time(f"cursor {sort} offset={offset}",
+                                lambda: list_projects(sort=sort, limit=args.limit, cursor=cursor), args.runs)
+        await _time("total (cached)", get_project_total, args.runs)
+    finally:
+        if db.pool:
+            await db.close_pool()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /api/projects against a seeded database")
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--suggestions", type=int, default=30000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
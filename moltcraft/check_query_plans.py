@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+import asyncio
+import argparse
+import secrets
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncpg
+
+import db
+from bench_projects import seed
+
+# Plans the hot queries against a migrated, seeded throwaway schema and exits non-zero
+# if any of them would scan a whole table. Sequential scans are disabled for the check,
+# so a Seq Scan in a plan means no index can serve the query at all.
+#
+#   DATABASE_URL=postgres://... python moltcraft/check_query_plans.py
+
+AGENT = "bench-1"
+
+HOT_QUERIES = [
+    ("browse newest", """
+        SELECT id FROM projects ORDER BY created_at DESC, id DESC LIMIT $1 OFFSET $2
+    """, (50, 0)),
+    ("browse newest cursor", """
+        SELECT id FROM projects WHERE (created_at, id) < (NOW(), $2)
+        ORDER BY created_at DESC, id DESC LIMIT $1
+    """, (50, 5000)),
+    ("browse top cursor", """
+        SELECT id FROM projects WHERE (upvotes, created_at, id) < ($2, NOW(), $3)
+        ORDER BY upvotes DESC, created_at DESC, id DESC LIMIT $1
+    """, (50, 100, 5000)),
+    ("browse random window", """
+        SELECT id FROM projects WHERE rand_key >= $2 ORDER BY rand_key LIMIT $1
+    """, (50, 0.5)),
+    ("nearby plots", """
+        SELECT id FROM projects
+        WHERE grid_x BETWEEN $1 AND $2 AND grid_z BETWEEN $3 AND $4
+        ORDER BY GREATEST(ABS(grid_x - $5), ABS(grid_z - $6)), id LIMIT 20
+    """, (-2, 2, -2, 2, 0, 0)),
+    ("project suggestion count", """
+        SELECT COUNT(*) FROM suggestions WHERE project_id = $1
+    """, (42, )),
+    ("owned projects", """
+        SELECT id FROM projects WHERE agent_id = $1
+    """, (AGENT, )),
+    ("inbox summary", """
+        SELECT p.id as project_id, p.name as project_name, COUNT(s.id) as unread_count
+        FROM projects p
+        JOIN suggestions s ON s.project_id = p.id
+        WHERE p.agent_id = $1 AND s.read_at IS NULL
+        GROUP BY p.id, p.name
+        ORDER BY MAX(s.created_at) DESC
+    """, (AGENT, )),
+    ("unread suggestions", """
+        SELECT s.id, s.suggestion, a.display_name as author_name, s.created_at
+        FROM suggestions s
+        LEFT JOIN agents a ON a.identifier = s.agent_id
+        WHERE s.project_id = $1 AND s.read_at IS NULL
+        ORDER BY s.created_at DESC
+    """, (42, )),
+    ("idle sweep", """
+        SELECT identifier, display_name FROM agents
+        WHERE connected = true AND last_active_at < NOW() - make_interval(secs => $1)
+    """, (300, )),
+    ("bot cap count", """
+        SELECT COUNT(*) as count FROM agents WHERE bot_id IS NOT NULL
+    """, ()),
+    ("oldest idle bot", """
+        SELECT identifier, bot_id, display_name FROM agents
+        WHERE bot_id IS NOT NULL ORDER BY last_active_at ASC NULLS FIRST LIMIT 1
+    """, ()),
+]
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def main(args):
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        raise SystemExit("DATABASE_URL environment variable not set")
+    schema = f"plancheck_{secrets.token_hex(4)}"
+    admin = await asyncpg.connect(database_url)
+    await admin.execute(f"CREATE SCHEMA {schema}")
+    failures = 0
+    try:
+        db.pool = await asyncpg.create_pool(database_url, server_settings={"search_path": schema})
+        await db.init_db()
+        async with db.pool.acquire() as conn:
+            await seed(conn, args.projects, args.agents, args.suggestions)
+            await conn.execute("""
+                UPDATE agents SET connected = random() < 0.1,
+                                  bot_id = CASE WHEN random() < 0.02 THEN identifier END,
+                                  last_active_at = NOW() - random() * INTERVAL '1 day'
+            """)
+            await conn.execute("UPDATE suggestions SET read_at = NOW() WHERE random() < 0.8")
+            await conn.execute("ANALYZE")
+            await conn.execute("SET enable_seqscan = off")
+            for name, sql, params in HOT_QUERIES:
+                raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *params)
+                plan = json.loads(raw)[0]["Plan"]
+                scans = _seq_scans(plan)
+                status = "FAIL" if scans else "ok"
+                failures += bool(scans)
+                print(f"[PLAN] {status:<4} {name:<26} {plan['Node Type']}"
+                      + (f" (seq scan on {', '.join(scans)})" if scans else ""))
+    finally:
+        if db.pool:
+            await db.close_pool()
+        await admin.execute(f"DROP SCHEMA {schema} CASCADE")
+        await admin.close()
+    if failures:
+        raise SystemExit(f"{failures} hot queries are not index-backed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that hot queries use indexes")
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--suggestions", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
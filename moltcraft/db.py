@@ -1,8 +1,54 @@
 import os
 import asyncpg
+from contextlib import asynccontextmanager
 
 pool = None
 
+# Schema changes after the base tables, applied in order and recorded in schema_migrations.
+# Never edit an applied migration; append a new one. Statements are idempotent so databases
+# that got these changes before the runner existed migrate cleanly.
+MIGRATIONS = [
+    (1, "structure placement state", [
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS placed_box INT[]",
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS placed_stem TEXT",
+    ]),
+    (2, "project browse orderings", [
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS rand_key DOUBLE PRECISION NOT NULL DEFAULT random()",
+        "CREATE INDEX IF NOT EXISTS idx_projects_newest ON projects(created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_top ON projects(upvotes DESC, created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_rand_key ON projects(rand_key)",
+        "CREATE INDEX IF NOT EXISTS idx_suggestions_project ON suggestions(project_id)",
+    ]),
+    (3, "hot query indexes", [
+        # Inbox and unresolved-feedback queries only ever look at unread suggestions.
+        "CREATE INDEX IF NOT EXISTS idx_suggestions_unread ON suggestions(project_id, created_at DESC) WHERE read_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS idx_projects_agent ON projects(agent_id)",
+        # Idle sweep, bot cap count and oldest-idle-bot eviction.
+        "CREATE INDEX IF NOT EXISTS idx_agents_connected_active ON agents(last_active_at) WHERE connected",
+        "CREATE INDEX IF NOT EXISTS idx_agents_bot_active ON agents(last_active_at ASC NULLS FIRST) WHERE bot_id IS NOT NULL",
+    ]),
+    (4, "plot allocator", [
+        # Next free spiral index; projects are never deleted, so on upgrade it is the row count.
+        "CREATE TABLE IF NOT EXISTS plot_allocator (id INT PRIMARY KEY CHECK (id = 1), next_index INT NOT NULL)",
+        "INSERT INTO plot_allocator (id, next_index) SELECT 1, COUNT(*) FROM projects ON CONFLICT (id) DO NOTHING",
+    ]),
+    (5, "decorated plots", [
+        # A row means the plot's floor and border are in place in that world.
+        """CREATE TABLE IF NOT EXISTS decorated_plots (
+            grid_x INT NOT NULL,
+            grid_z INT NOT NULL,
+            world_id TEXT NOT NULL,
+            decorated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (grid_x, grid_z)
+        )""",
+    ]),
+    (6, "placed world", [
+        # placed_box/placed_stem only describe the world they were recorded in.
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS placed_world TEXT",
+    ]),
+]
+MIGRATION_LOCK = 7315001
+
 
 async def init_pool():
     global pool
@@ -70,12 +116,44 @@ async def init_db():
             )
         """)
 
+        await migrate(conn)
+
         await conn.execute("""
             UPDATE agents SET connected = false, bot_id = NULL WHERE connected = true
         """)
     print("[DB] Database schema initialized (tables created if not exist, agents reset)")
 
 
+async def migrate(conn):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    async with conn.transaction():
+        # Serializes concurrent starts; released when the transaction ends.
+        await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK)
+        applied = {r["version"] for r in await conn.fetch("SELECT version FROM schema_migrations")}
+        for version, name, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            for statement in statements:
+                await conn.execute(statement)
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                version, name)
+            print(f"[DB] Applied migration {version}: {name}")
+
+
+@asynccontextmanager
+async def transaction():
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            yield conn
+
+
 async def execute(sql, params=None):
     async with pool.acquire() as conn:
         if params:
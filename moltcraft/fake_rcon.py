@@ -0,0 +1,249 @@
+import sys
+import os
+import re
+import time
+import random
+import struct
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Stand-in for the Paper server's RCON listener. It speaks the Source RCON protocol,
+# records every command, and can inject the failures we see in production: slow ticks,
+# fragmented output, dropped connections and failing /place commands.
+#
+#   python moltcraft/fake_rcon.py --port 25576 --latency-ms 5 --drop-every 500
+#   RCON_PORT=25576 python moltcraft/api.py        # point the API at it
+#   python moltcraft/fake_rcon.py --bench 20000    # benchmark RconPool against it
+
+AUTH = 3
+EXEC = 2
+RESPONSE = 0
+MAX_FRAGMENT = 4096
+
+
+def _packet(request_id, packet_type, payload: bytes) -> bytes:
+    data = struct.pack("<ii", request_id, packet_type) + payload + b"\x00\x00"
+    return struct.pack("<i", len(data)) + data
+
+
+class FakeRconServer:
+    def __init__(self, host="127.0.0.1", port=25575, password=None,
+                 latency=0.0, jitter=0.0, fragment_size=MAX_FRAGMENT,
+                 drop_every=0, place_fail_rate=0.0, mspt=5.0, seed=None):
+        self.host = host
+        self.port = port
+        self.password = password or os.environ.get("RCON_PASSWORD", "minecraft-ai-builder")
+        self.latency = latency
+        self.jitter = jitter
+        self.fragment_size = fragment_size
+        self.drop_every = drop_every
+        self.place_fail_rate = place_fail_rate
+        self.mspt = mspt
+        self.random = random.Random(seed)
+        self.commands: list[str] = []
+        self.connections = 0
+        self.drops = 0
+        self.place_failures = 0
+        self.forceloaded: set[tuple[int, int]] = set()
+        self._server = None
+        self._writers = set()
+        self._handlers = set()
+        # Like the real server, commands from every connection run on one "main thread".
+        self._main_thread = asyncio.Lock()
+        self._responders = [
+            (re.compile(r"list\b"), self._list),
+            (re.compile(r"tick query\b"), self._tick_query),
+            (re.compile(r"place template (\S+) (-?\d+) (-?\d+) (-?\d+)"), self._place),
+            (re.compile(r"forceload add (-?\d+) (-?\d+) (-?\d+) (-?\d+)"), self._forceload_add),
+            (re.compile(r"forceload remove (-?\d+) (-?\d+) (-?\d+) (-?\d+)"), self._forceload_remove),
+            (re.compile(r"forceload remove all\b"), self._forceload_remove_all),
+            (re.compile(r"forceload query\b"), self._forceload_query),
+            (re.compile(r"execute( if loaded -?\d+ -?\d+ -?\d+)+$"), self._if_loaded),
+            (re.compile(r"fill\b"), lambda m: "Successfully filled 1 block(s)"),
+            (re.compile(r"(say|tell|gamerule|gamemode|effect|weather|kill)\b"), lambda m: ""),
+        ]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"[FAKE RCON] Listening on {self.host}:{self.port}")
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def disconnect_all(self):
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        self._handlers.add(asyncio.current_task())
+        authed = False
+        try:
+            while True:
+                length = struct.unpack("<i", await reader.readexactly(4))[0]
+                data = await reader.readexactly(length)
+                request_id, packet_type = struct.unpack("<ii", data[:8])
+                payload = data[8:-2].decode("utf-8", errors="replace")
+                if packet_type == AUTH:
+                    authed = payload == self.password
+                    writer.write(_packet(request_id if authed else -1, EXEC, b""))
+                elif not authed:
+                    break
+                elif packet_type == EXEC:
+                    if self.drop_every and (len(self.commands) + 1) % self.drop_every == 0:
+                        self.commands.append(payload)
+                        self.drops += 1
+                        break
+                    output = (await self._execute(payload)).encode("utf-8")
+                    for i in range(0, max(len(output), 1), self.fragment_size):
+                        writer.write(_packet(request_id, RESPONSE, output[i:i + self.fragment_size]))
+                else:
+                    writer.write(_packet(request_id, RESPONSE,
+                                         f"Unknown request {packet_type:x}".encode()))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def _execute(self, cmd: str) -> str:
+        self.commands.append(cmd)
+        async with self._main_thread:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+            cmd = cmd.lstrip("/")
+            for pattern, responder in self._responders:
+                match = pattern.match(cmd)
+                if match:
+                    return responder(match)
+            return f"Unknown or incomplete command, see below for error\n{cmd}<--[HERE]"
+
+    def _list(self, match):
+        return "There are 0 of a max of 100 players online: "
+
+    def _tick_query(self, match):
+        return ("The game is running normally\nTarget tick rate: 20.0 per second.\n"
+                f"Average time per tick: {self.mspt:.1f}ms (Target: 50.0ms)")
+
+    def _place(self, match):
+        if self.place_fail_rate and self.random.random() < self.place_fail_rate:
+            self.place_failures += 1
+            return "Failed to place template"
+        name, x, y, z = match.groups()
+        return f"Template {name} placed at {x}, {y}, {z}"
+
+    def _chunks(self, match):
+        x1, z1, x2, z2 = (int(v) >> 4 for v in match.groups())
+        return {(cx, cz) for cx in range(min(x1, x2), max(x1, x2) + 1)
+                for cz in range(min(z1, z2), max(z1, z2) + 1)}
+
+    def _forceload_add(self, match):
+        chunks = self._chunks(match)
+        self.forceloaded |= chunks
+        return f"Marked {len(chunks)} chunks in minecraft:overworld to be force loaded"
+
+    def _forceload_remove(self, match):
+        chunks = self._chunks(match)
+        self.forceloaded -= chunks
+        return f"Unmarked {len(chunks)} chunks in minecraft:overworld for force loading"
+
+    def _if_loaded(self, match):
+        # Force-loaded chunks count as loaded straight away.
+        points = re.findall(r"if loaded (-?\d+) -?\d+ (-?\d+)", match.group(0))
+        if all((int(x) >> 4, int(z) >> 4) in self.forceloaded for x, z in points):
+            return "Test passed"
+        return "Test failed"
+
+    def _forceload_remove_all(self, match):
+        self.forceloaded.clear()
+        return "Unmarked all force loaded chunks in minecraft:overworld"
+
+    def _forceload_query(self, match):
+        if not self.forceloaded:
+            return "No force loaded chunks were found in minecraft:overworld"
+        coords = ", ".join(f"[{x}, {z}]" for x, z in sorted(self.forceloaded))
+        return f"{len(self.forceloaded)} force loaded chunks were found in minecraft:overworld at: {coords}"
+
+
+async def _bench(server: FakeRconServer, count: int, concurrency: int):
+    from rcon import RconPool, INTERACTIVE
+
+    pool = RconPool(size=4, host=server.host, port=server.port, password=server.password)
+    pool.init()
+    try:
+        await pool.command("list")
+
+        started = time.perf_counter()
+        executed, errors = await pool.batch([f"fill 0 0 0 1 1 {i}" for i in range(count)], "Bench")
+        elapsed = time.perf_counter() - started
+        print(f"[BENCH] batch: {executed}/{count} commands in {elapsed:.2f}s "
+              f"({executed / elapsed:.0f} cmd/s), errors={len(errors)}")
+
+        latencies = []
+
+        async def single(i):
+            t = time.perf_counter()
+            await pool.command_safe(f"say bench {i}", "Bench", INTERACTIVE)
+            latencies.append(time.perf_counter() - t)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(single(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        print(f"[BENCH] {concurrency} concurrent commands in {elapsed:.2f}s, "
+              f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+              f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+        print(f"[BENCH] server: {len(server.commands)} commands, {server.connections} connections, "
+              f"{server.drops} drops")
+    finally:
+        pool.close()
+
+
+async def _main(args):
+    server = await FakeRconServer(
+        host=args.host, port=args.port, password=args.password,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        fragment_size=args.fragment_size, drop_every=args.drop_every,
+        place_fail_rate=args.place_fail_rate, mspt=args.mspt, seed=args.seed,
+    ).start()
+    try:
+        if args.bench:
+            await _bench(server, args.bench, args.concurrency)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Minecraft RCON server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=25575, help="0 picks a free port")
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="per-command server time")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fragment-size", type=int, default=MAX_FRAGMENT)
+    parser.add_argument("--drop-every", type=int, default=0, help="close the connection on every Nth command")
+    parser.add_argument("--place-fail-rate", type=float, default=0.0)
+    parser.add_argument("--mspt", type=float, default=5.0, help="reported by /tick query")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--bench", type=int, default=0, help="run a RconPool benchmark with N batched commands")
+    parser.add_argument("--concurrency", type=int, default=200)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
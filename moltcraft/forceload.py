@@ -0,0 +1,157 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+
+from grid import GROUND_Y, get_forceload_commands
+from rcon import BUILD, BACKGROUND
+
+MAX_CHUNKS = int(os.environ.get("FORCELOAD_MAX_CHUNKS", "400"))
+READY_TIMEOUT = 5.0
+READY_POLL = 0.1
+# Chunks tested per `execute if loaded` command; RCON requests are capped at 1446 bytes.
+READY_POINTS = 40
+
+
+def _key(bounds: dict) -> tuple:
+    return (bounds["x1"], bounds["z1"], bounds["x2"], bounds["z2"])
+
+
+def _chunks(key: tuple) -> list[tuple[int, int]]:
+    x1, z1, x2, z2 = key
+    return [(cx, cz) for cx in range(x1 >> 4, (x2 >> 4) + 1) for cz in range(z1 >> 4, (z2 >> 4) + 1)]
+
+
+def _remove_commands(chunks) -> list[str]:
+    # One /forceload remove per run of adjacent chunks in a row, so nothing outside is touched.
+    commands = []
+    for cz in sorted({cz for _, cz in chunks}):
+        xs = sorted(cx for cx, z in chunks if z == cz)
+        start = xs[0]
+        for prev, cx in zip(xs, xs[1:] + [None]):
+            if cx != prev + 1:
+                commands.append(f"/forceload remove {start * 16} {cz * 16} {prev * 16 + 15} {cz * 16 + 15}")
+                start = cx
+    return commands
+
+
+def _chunk_points(key: tuple) -> list[tuple[int, int]]:
+    x1, z1, x2, z2 = key
+    return [(max(x1, cx * 16), max(z1, cz * 16))
+            for cx in range(x1 >> 4, (x2 >> 4) + 1)
+            for cz in range(z1 >> 4, (z2 >> 4) + 1)]
+
+
+class ForceloadCache:
+    def __init__(self, pool, max_chunks: int = MAX_CHUNKS):
+        self.pool = pool
+        self.max_chunks = max_chunks
+        # Force-loaded areas, least recently used first, with their chunk counts.
+        self._areas: OrderedDict[tuple, int] = OrderedDict()
+        # How many cached areas cover each forced chunk; neighbouring areas can share one.
+        self._forced: dict[tuple[int, int], int] = {}
+        # Areas a build or the world decoration is working in; never evicted.
+        self._holds: dict[tuple, int] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.timeouts = 0
+
+    @property
+    def chunks(self) -> int:
+        return len(self._forced)
+
+    async def _ready(self, key: tuple, priority: str = BUILD) -> bool:
+        # "Test passed" only if every chunk in the command is loaded.
+        points = _chunk_points(key)
+        for i in range(0, len(points), READY_POINTS):
+            conditions = " ".join(f"if loaded {x} {GROUND_Y} {z}" for x, z in points[i:i + READY_POINTS])
+            result = await self.pool.command_safe(f"/execute {conditions}", "Forceload check", priority)
+            if "passed" not in (result or "").lower():
+                return False
+        return True
+
+    async def wait_ready(self, bounds: dict, timeout: float = READY_TIMEOUT,
+                         priority: str = BUILD) -> bool:
+        key = _key(bounds)
+        deadline = time.monotonic() + timeout
+        while not await self._ready(key, priority):
+            if time.monotonic() >= deadline:
+                self.timeouts += 1
+                return False
+            await asyncio.sleep(READY_POLL)
+        return True
+
+    async def acquire(self, bounds: dict, priority: str = BUILD, timeout: float = READY_TIMEOUT) -> bool:
+        key = _key(bounds)
+        self._holds[key] = self._holds.get(key, 0) + 1
+        try:
+            return await self._load(key, priority, timeout)
+        except BaseException:
+            # The caller only releases after acquire returns; don't leak the hold.
+            self.release(bounds)
+            raise
+
+    async def _load(self, key: tuple, priority: str, timeout: float) -> bool:
+        if key in self._areas:
+            self._areas.move_to_end(key)
+            if await self._ready(key, priority):
+                self.hits += 1
+                return True
+        else:
+            chunks = _chunks(key)
+            self._areas[key] = len(chunks)
+            for chunk in chunks:
+                self._forced[chunk] = self._forced.get(chunk, 0) + 1
+            await self._evict()
+
+        bounds = dict(zip(("x1", "z1", "x2", "z2"), key))
+        for cmd in get_forceload_commands(bounds):
+            await self.pool.command(cmd, priority)
+        self.loads += 1
+        return await self.wait_ready(bounds, timeout, priority)
+
+    def release(self, bounds: dict):
+        key = _key(bounds)
+        self._holds[key] -= 1
+        if not self._holds[key]:
+            del self._holds[key]
+
+    async def _evict(self):
+        for key in list(self._areas):
+            if self.chunks <= self.max_chunks:
+                break
+            if key in self._holds:
+                continue
+            del self._areas[key]
+            # Chunks another cached area still covers stay forced.
+            freed = []
+            for chunk in _chunks(key):
+                self._forced[chunk] -= 1
+                if not self._forced[chunk]:
+                    del self._forced[chunk]
+                    freed.append(chunk)
+            for cmd in _remove_commands(freed):
+                await self.pool.command_safe(cmd, "Forceload evict", BACKGROUND)
+            self.evictions += 1
+
+    async def reset(self) -> bool:
+        # Forced chunks outlive the process in the world save; start from a clean slate.
+        if self._holds:
+            return False
+        await self.pool.command("/forceload remove all", BACKGROUND)
+        self._areas.clear()
+        self._forced.clear()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "areas": len(self._areas),
+            "chunks": self.chunks,
+            "max_chunks": self.max_chunks,
+            "held": len(self._holds),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "timeouts": self.timeouts,
+        }
@@ -1,14 +1,48 @@
+from math import isqrt
+
 PLOT_SIZE = 64
 GROUND_Y = -60
+WORLD_MIN_Y = -64
+WORLD_MAX_Y = 319
 GAP = 8
 STRIDE = PLOT_SIZE + GAP
 HALF = PLOT_SIZE // 2
-
-
-def get_next_grid_coords(taken_plots: set) -> tuple[int, int]:
-    for x, z in spiral_generator():
-        if (x, z) not in taken_plots:
-            return (x, z)
+# Paper's default commandModificationBlockLimit.
+FILL_LIMIT = 32768
+FORCELOAD_LIMIT = 256
+# Plots per side of one merged decoration region: 3x3 plots is at most 15x15 chunks,
+# a single /forceload call that the server can load in one go.
+DECORATION_MAX_SPAN = 3
+
+
+def spiral_coords(index: int) -> tuple[int, int]:
+    # Ring L (L >= 1) holds indices (2L-1)^2 .. (2L+1)^2 - 1 in four sides of 2L cells:
+    # x = L going +z, z = L going -x, x = -L going -z, then z = -L going +x.
+    if index == 0:
+        return (0, 0)
+    layer = (isqrt(index) + 1) // 2
+    side, k = divmod(index - (2 * layer - 1) ** 2, 2 * layer)
+    if side == 0:
+        return (layer, k - layer + 1)
+    if side == 1:
+        return (layer - 1 - k, layer)
+    if side == 2:
+        return (-layer, layer - 1 - k)
+    return (k - layer + 1, -layer)
+
+
+def spiral_index(grid_x: int, grid_z: int) -> int:
+    layer = max(abs(grid_x), abs(grid_z))
+    if layer == 0:
+        return 0
+    base = (2 * layer - 1) ** 2
+    if grid_x == layer and grid_z > -layer:
+        return base + grid_z + layer - 1
+    if grid_z == layer:
+        return base + 2 * layer + layer - 1 - grid_x
+    if grid_x == -layer:
+        return base + 4 * layer + layer - 1 - grid_z
+    return base + 6 * layer + grid_x + layer - 1
 
 
 def grid_to_world(grid_x: int, grid_z: int) -> dict:
@@ -19,6 +53,24 @@ def grid_to_world(grid_x: int, grid_z: int) -> dict:
     return {"x": world_x, "y": GROUND_Y, "z": world_z}
 
 
+def world_to_grid(x: int, z: int) -> tuple[int, int] | None:
+    # Plot g covers g * STRIDE - HALF .. + PLOT_SIZE - 1; the GAP after it is path, not plot.
+    grid_x, offset_x = divmod(x + HALF, STRIDE)
+    grid_z, offset_z = divmod(z + HALF, STRIDE)
+    if offset_x >= PLOT_SIZE or offset_z >= PLOT_SIZE:
+        return None
+    return (grid_x, grid_z)
+
+
+def nearest_grid(x: int, z: int) -> tuple[int, int]:
+    return ((x + STRIDE // 2) // STRIDE, (z + STRIDE // 2) // STRIDE)
+
+
+def grid_distance(grid_x1: int, grid_z1: int, grid_x2: int, grid_z2: int) -> int:
+    # Rings around a plot, matching how the spiral grows.
+    return max(abs(grid_x1 - grid_x2), abs(grid_z1 - grid_z2))
+
+
 def get_plot_bounds(grid_x: int, grid_z: int) -> dict:
     x1 = grid_x * STRIDE - HALF
     z1 = grid_z * STRIDE - HALF
@@ -34,37 +86,105 @@ def get_buildable_origin(grid_x: int, grid_z: int) -> dict:
     return {"x": center_x, "y": GROUND_Y, "z": center_z}
 
 
-def get_decoration_commands(grid_x: int, grid_z: int) -> list[str]:
-    bounds = get_plot_bounds(grid_x, grid_z)
-    x1, z1, x2, z2 = bounds["x1"], bounds["z1"], bounds["x2"], bounds["z2"]
-    y = GROUND_Y
+def get_reset_commands(plot_bounds: dict, placed_box: list) -> list[str] | None:
+    # Clears exactly the box the last structure occupied: grass back on the floor layer,
+    # air above it, in tiles the caller can pace like structure pieces.
+    x1, y1, z1, x2, y2, z2 = placed_box
+    x1, x2 = max(x1, plot_bounds["x1"]), min(x2, plot_bounds["x2"])
+    z1, z2 = max(z1, plot_bounds["z1"]), min(z2, plot_bounds["z2"])
+    y1, y2 = max(y1, GROUND_Y), min(y2, WORLD_MAX_Y)
+    if x2 < x1 or z2 < z1 or y2 < y1:
+        return None
     commands = []
-
-    ox1, oz1 = x1 - GAP, z1 - GAP
-    ox2, oz2 = x2 + GAP, z2 + GAP
-
-    commands.append(f"/fill {ox1} {y} {oz1} {ox2} {y} {oz2} minecraft:stone_bricks")
-
-    commands.append(f"/fill {x1} {y} {z1} {x2} {y} {z2} minecraft:grass_block")
-
+    if y1 == GROUND_Y:
+        commands += _fill_commands(x1, z1, x2, z2, "minecraft:grass_block")
+        y1 += 1
+    if y1 <= y2:
+        commands += _fill_commands(x1, z1, x2, z2, "minecraft:air", y1, y2)
     return commands
 
 
-def spiral_generator():
-    yield (0, 0)
-
-    layer = 1
-    while True:
-        for z_val in range(-(layer - 1), layer + 1):
-            yield (layer, z_val)
-
-        for x_val in range(layer - 1, -layer - 1, -1):
-            yield (x_val, layer)
-
-        for z_val in range(layer - 1, -layer - 1, -1):
-            yield (-layer, z_val)
-
-        for x_val in range(-layer + 1, layer + 1):
-            yield (x_val, -layer)
-
-        layer += 1
+def _fill_commands(x1: int, z1: int, x2: int, z2: int, block: str,
+                   y1: int = GROUND_Y, y2: int = GROUND_Y) -> list[str]:
+    # Tiled so no single /fill exceeds the server's FILL_LIMIT; a tile that fits stacks
+    # as many whole layers as the limit allows.
+    width, depth = x2 - x1 + 1, z2 - z1 + 1
+    side = isqrt(FILL_LIMIT)
+    if width * depth <= FILL_LIMIT:
+        step_x, step_z = width, depth
+    elif depth <= side:
+        step_x, step_z = FILL_LIMIT // depth, depth
+    elif width <= side:
+        step_x, step_z = width, FILL_LIMIT // width
+    else:
+        step_x = step_z = side
+    step_y = FILL_LIMIT // (step_x * step_z)
+    return [
+        f"/fill {x} {y} {z} {min(x + step_x - 1, x2)} {min(y + step_y - 1, y2)} {min(z + step_z - 1, z2)} {block}"
+        for x in range(x1, x2 + 1, step_x)
+        for z in range(z1, z2 + 1, step_z)
+        for y in range(y1, y2 + 1, step_y)
+    ]
+
+
+def _plot_rectangles(plots) -> list[tuple[int, int, int, int]]:
+    # Greedy cover of the plot set with solid rectangles: grow along x, then along z
+    # while the whole row is present.
+    remaining = set(plots)
+    rectangles = []
+    for grid_z, grid_x in sorted((z, x) for x, z in remaining):
+        if (grid_x, grid_z) not in remaining:
+            continue
+        end_x = grid_x
+        while end_x - grid_x + 1 < DECORATION_MAX_SPAN and (end_x + 1, grid_z) in remaining:
+            end_x += 1
+        end_z = grid_z
+        while end_z - grid_z + 1 < DECORATION_MAX_SPAN and all(
+                (x, end_z + 1) in remaining for x in range(grid_x, end_x + 1)):
+            end_z += 1
+        for x in range(grid_x, end_x + 1):
+            for z in range(grid_z, end_z + 1):
+                remaining.discard((x, z))
+        rectangles.append((grid_x, grid_z, end_x, end_z))
+    return rectangles
+
+
+def get_decoration_regions(plots) -> list[dict]:
+    regions = []
+    for gx1, gz1, gx2, gz2 in _plot_rectangles(plots):
+        x1, z1 = gx1 * STRIDE - HALF, gz1 * STRIDE - HALF
+        x2, z2 = gx2 * STRIDE - HALF + PLOT_SIZE - 1, gz2 * STRIDE - HALF + PLOT_SIZE - 1
+        ox1, oz1, ox2, oz2 = x1 - GAP, z1 - GAP, x2 + GAP, z2 + GAP
+        plots_in = [(x, z) for x in range(gx1, gx2 + 1) for z in range(gz1, gz2 + 1)]
+
+        # Either stone under everything and grass per plot, or grass under everything and
+        # stone along each path; whichever needs fewer fills for this rectangle.
+        per_plot = _fill_commands(ox1, oz1, ox2, oz2, "minecraft:stone_bricks")
+        for gx, gz in plots_in:
+            b = get_plot_bounds(gx, gz)
+            per_plot += _fill_commands(b["x1"], b["z1"], b["x2"], b["z2"], "minecraft:grass_block")
+        paths = _fill_commands(x1, z1, x2, z2, "minecraft:grass_block")
+        for gz in range(gz1, gz2 + 2):
+            edge = gz * STRIDE - HALF
+            paths += _fill_commands(ox1, edge - GAP, ox2, edge - 1, "minecraft:stone_bricks")
+        for gx in range(gx1, gx2 + 2):
+            edge = gx * STRIDE - HALF
+            paths += _fill_commands(edge - GAP, oz1, edge - 1, oz2, "minecraft:stone_bricks")
+
+        regions.append({
+            "plots": plots_in,
+            "bounds": {"x1": ox1, "z1": oz1, "x2": ox2, "z2": oz2},
+            "commands": min(per_plot, paths, key=len),
+        })
+    return regions
+
+
+def get_forceload_commands(bounds: dict, action: str = "add") -> list[str]:
+    # /forceload takes at most FORCELOAD_LIMIT chunks per call, so wide areas go in bands.
+    cx1, cz1, cx2, cz2 = bounds["x1"] >> 4, bounds["z1"] >> 4, bounds["x2"] >> 4, bounds["z2"] >> 4
+    rows = max(1, FORCELOAD_LIMIT // (cx2 - cx1 + 1))
+    return [
+        f"/forceload {action} {bounds['x1']} {max(bounds['z1'], cz * 16)} "
+        f"{bounds['x2']} {min(bounds['z2'], (cz + rows) * 16 - 1)}"
+        for cz in range(cz1, cz2 + 1, rows)
+    ]
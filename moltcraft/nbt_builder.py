@@ -3,15 +3,25 @@ import glob
 import gzip
 import struct
 import io
+import sys
+import tempfile
 import time
+from array import array
 
-STRUCTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "minecraft-server", "world", "generated", "moltcraft", "structures")
+from voxels import FLOOR_BLOCK
+
+STRUCTURE_DIR = os.environ.get("MOLTCRAFT_STRUCTURE_DIR") or os.path.join(
+    os.path.dirname(__file__), "..", "minecraft-server", "world", "generated", "moltcraft", "structures")
 DATA_VERSION = 3953
+COMPRESS_LEVEL = int(os.environ.get("NBT_COMPRESS_LEVEL", "6"))
+RECORD_CHUNK = 65536
+# Structures above this many blocks are placed as several chunk-aligned templates.
+SPLIT_THRESHOLD = int(os.environ.get("NBT_SPLIT_THRESHOLD", "32768"))
 
 
 class _NBTWriter:
-    def __init__(self):
-        self.buf = io.BytesIO()
+    def __init__(self, stream=None):
+        self.buf = stream if stream is not None else io.BytesIO()
 
     def _byte(self, v):
         self.buf.write(struct.pack('>b', v))
@@ -62,55 +72,45 @@ class _NBTWriter:
         return self.buf.getvalue()
 
 
-def _parse_block(block: str) -> tuple:
-    if ":" not in block.split("[")[0]:
-        block = "minecraft:" + block
-
-    if "[" in block:
-        name = block[:block.index("[")]
-        props_str = block[block.index("[") + 1:block.rindex("]")]
-        properties = {}
-        for prop in props_str.split(","):
-            key, value = prop.strip().split("=", 1)
-            properties[key.strip()] = value.strip()
-        return name, properties
-    else:
-        return block, {}
-
-
-def blocks_to_nbt(blocks: dict, project_id: int) -> str:
-    solid_blocks = {pos: block for pos, block in blocks.items()
-                    if block not in ("minecraft:air", "air")}
-
-    if not solid_blocks:
-        return None
-
-    min_x = min(pos[0] for pos in solid_blocks)
-    min_y = min(pos[1] for pos in solid_blocks)
-    min_z = min(pos[2] for pos in solid_blocks)
-    max_x = max(pos[0] for pos in solid_blocks)
-    max_y = max(pos[1] for pos in solid_blocks)
-    max_z = max(pos[2] for pos in solid_blocks)
-
-    size_x = max_x - min_x + 1
-    size_y = max_y - min_y + 1
-    size_z = max_z - min_z + 1
-
-    palette_map = {}
-    palette_list = []
-    for block in sorted(set(solid_blocks.values())):
-        palette_map[block] = len(palette_list)
-        palette_list.append(block)
-
-    w = _NBTWriter()
+# One entry of the "blocks" list: {pos: [x, y, z], state: n}, with the
+# four int payloads zeroed. Every record has the same shape, so the whole
+# list is this template repeated and the ints are scattered in afterwards.
+_BLOCK_RECORD = (
+    b"\x09" + struct.pack(">h", 3) + b"pos" + b"\x03" + struct.pack(">i", 3)
+    + bytes(12)
+    + b"\x03" + struct.pack(">h", 5) + b"state" + bytes(4)
+    + b"\x00"
+)
+_RECORD_X = 11
+_RECORD_Y = 15
+_RECORD_Z = 19
+_RECORD_STATE = 31
+
+
+def _encode_block_records(xs, ys, zs, states) -> bytearray:
+    size = len(_BLOCK_RECORD)
+    out = bytearray(_BLOCK_RECORD) * len(states)
+    for offset, values in ((_RECORD_X, xs), (_RECORD_Y, ys), (_RECORD_Z, zs),
+                           (_RECORD_STATE, states)):
+        column = array("i", values)
+        if sys.byteorder == "little":
+            column.byteswap()
+        raw = column.tobytes()
+        for b in range(4):
+            out[offset + b::size] = raw[b::4]
+    return out
+
+
+def _write_structure(stream, size: tuple, palette: list, xs, ys, zs, states):
+    w = _NBTWriter(stream)
     w._byte(10)
     w._short(0)
 
     w.tag_int("DataVersion", DATA_VERSION)
-    w.tag_list_int("size", [size_x, size_y, size_z])
+    w.tag_list_int("size", list(size))
 
-    w.begin_list_compound("palette", len(palette_list))
-    for block in palette_list:
+    w.begin_list_compound("palette", len(palette))
+    for block in palette:
         name, properties = _parse_block(block)
         w.tag_string("Name", name)
         if properties:
@@ -120,39 +120,97 @@ def blocks_to_nbt(blocks: dict, project_id: int) -> str:
             w.end_compound()
         w.end_compound()
 
-    w.begin_list_compound("blocks", len(solid_blocks))
-    for (x, y, z), block in solid_blocks.items():
-        w.tag_list_int("pos", [x - min_x, y - min_y, z - min_z])
-        w.tag_int("state", palette_map[block])
-        w.end_compound()
+    xs, ys, zs, states = (array("i", values) for values in (xs, ys, zs, states))
+    w.begin_list_compound("blocks", len(states))
+    for start in range(0, len(states), RECORD_CHUNK):
+        end = start + RECORD_CHUNK
+        stream.write(_encode_block_records(xs[start:end], ys[start:end],
+                                           zs[start:end], states[start:end]))
 
     w.begin_list_compound("entities", 0)
 
     w.end_compound()
 
-    os.makedirs(STRUCTURE_DIR, exist_ok=True)
 
-    for old_file in glob.glob(os.path.join(STRUCTURE_DIR, f"build_{project_id}_*.nbt")):
+def _write_structure_file(filepath: str, *structure, compresslevel=None):
+    # Written under a dotted .tmp name and renamed into place, so the server
+    # never picks up a partially written template.
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".nbt.tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            level = COMPRESS_LEVEL if compresslevel is None else compresslevel
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0,
+                               compresslevel=level) as gz:
+                _write_structure(gz, *structure)
+        os.replace(tmp_path, filepath)
+    except BaseException:
         try:
-            os.remove(old_file)
-        except OSError:
-            pass
-    legacy = os.path.join(STRUCTURE_DIR, f"build_{project_id}.nbt")
-    if os.path.exists(legacy):
-        try:
-            os.remove(legacy)
+            os.remove(tmp_path)
         except OSError:
             pass
+        raise
+
+
+def _parse_block(block: str) -> tuple:
+    if ":" not in block.split("[")[0]:
+        block = "minecraft:" + block
+
+    if "[" in block:
+        name = block[:block.index("[")]
+        props_str = block[block.index("[") + 1:block.rindex("]")]
+        properties = {}
+        for prop in props_str.split(","):
+            key, value = prop.strip().split("=", 1)
+            properties[key.strip()] = value.strip()
+        return name, properties
+    else:
+        return block, {}
+
+
+def structure_stem(project_id: int, key: str = None) -> str:
+    if key:
+        return f"build_{project_id}_{key[:16]}"
+    return f"build_{project_id}_{int(time.time() * 1000)}"
+
+
+def blocks_to_nbt(blocks, stem: str, compresslevel: int = None) -> str:
+    if blocks.bounds is None:
+        return None
+
+    min_x, min_y, min_z, max_x, max_y, max_z = blocks.bounds
+    size_x = max_x - min_x + 1
+    size_y = max_y - min_y + 1
+    size_z = max_z - min_z + 1
 
-    ts = int(time.time() * 1000)
-    stem = f"build_{project_id}_{ts}"
     filepath = os.path.join(STRUCTURE_DIR, f"{stem}.nbt")
-    with open(filepath, 'wb') as f:
-        f.write(gzip.compress(w.getvalue()))
+    positions = blocks.positions
+    _write_structure_file(
+        filepath,
+        (size_x, size_y, size_z),
+        blocks.palette,
+        map((-min_x).__add__, positions[0::3]),
+        map((-min_y).__add__, positions[1::3]),
+        map((-min_z).__add__, positions[2::3]),
+        blocks.states,
+        compresslevel=compresslevel,
+    )
 
     return f"moltcraft:{stem}"
 
 
+def blocks_to_nbt_pieces(blocks, stem: str, origin: dict) -> list[dict]:
+    pieces = blocks.split_chunks(origin["x"], origin["z"], SPLIT_THRESHOLD)
+    if len(pieces) == 1:
+        name = blocks_to_nbt(blocks, stem)
+        return [{"structure": name, "bounds": blocks.bounds}] if name else []
+    return [
+        {"structure": blocks_to_nbt(piece, f"{stem}_p{i}"), "bounds": piece.bounds}
+        for i, piece in enumerate(pieces)
+    ]
+
+
 RESET_HEIGHT = 124
 
 def generate_reset_nbt() -> str:
@@ -168,55 +226,43 @@ def generate_reset_nbt() -> str:
     size_y = RESET_HEIGHT
 
     palette_list = [
-        "minecraft:grass_block",
+        FLOOR_BLOCK,
         "minecraft:air",
     ]
 
-    blocks_list = []
+    column = size_y
+    columns = size_x * size_z
+    xs = array("i")
     for x in range(size_x):
-        for z in range(size_z):
-            blocks_list.append(((x, 0, z), 0))
-            for y in range(1, size_y):
-                blocks_list.append(((x, y, z), 1))
-
-    w = _NBTWriter()
-    w._byte(10)
-    w._short(0)
-
-    w.tag_int("DataVersion", DATA_VERSION)
-    w.tag_list_int("size", [size_x, size_y, size_z])
+        xs.extend(array("i", [x]) * (size_z * column))
+    zs = array("i")
+    for z in range(size_z):
+        zs.extend(array("i", [z]) * column)
+    zs *= size_x
+    ys = array("i", range(column)) * columns
+    states = (array("i", [0]) + array("i", [1]) * (column - 1)) * columns
 
-    w.begin_list_compound("palette", len(palette_list))
-    for block in palette_list:
-        w.tag_string("Name", block)
-        w.end_compound()
+    _write_structure_file(filepath, (size_x, size_y, size_z), palette_list, xs, ys, zs, states)
 
-    w.begin_list_compound("blocks", len(blocks_list))
-    for (x, y, z), state in blocks_list:
-        w.tag_list_int("pos", [x, y, z])
-        w.tag_int("state", state)
-        w.end_compound()
-
-    w.begin_list_compound("entities", 0)
-    w.end_compound()
-
-    with open(filepath, 'wb') as f:
-        f.write(gzip.compress(w.getvalue()))
-
-    print(f"[NBT] Generated plot reset template ({size_x}x{size_y}x{size_z}, {len(blocks_list)} blocks)")
+    print(f"[NBT] Generated plot reset template ({size_x}x{size_y}x{size_z}, {len(states)} blocks)")
     return "moltcraft:plot_reset"
 
 
-def get_structure_offset(blocks: dict, origin: dict) -> tuple:
-    solid_blocks = {pos: block for pos, block in blocks.items()
-                    if block not in ("minecraft:air", "air")}
+def cleanup_sized_reset_templates():
+    # Per-size reset templates from before dirty boxes were cleared with /fill.
+    for pattern in ("plot_reset_*.nbt", "plot_clear_*.nbt"):
+        for path in glob.glob(os.path.join(STRUCTURE_DIR, pattern)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
 
-    if not solid_blocks:
+def get_structure_offset(bounds, origin: dict) -> tuple:
+    if bounds is None:
         return (origin["x"], origin["y"], origin["z"])
 
-    min_x = min(pos[0] for pos in solid_blocks)
-    min_y = min(pos[1] for pos in solid_blocks)
-    min_z = min(pos[2] for pos in solid_blocks)
+    min_x, min_y, min_z = bounds[:3]
 
     world_y = origin["y"] + min_y
     if world_y < -64:
@@ -1,184 +1,637 @@
-import socket
 import struct
-import time
 import os
+import time
+import random
 import asyncio
+import codecs
+from collections import deque
 from contextlib import asynccontextmanager
 
+READ_TIMEOUT = 15
+# Commands written ahead of the oldest unanswered one on a single connection.
+PIPELINE_WINDOW = int(os.environ.get("RCON_PIPELINE_WINDOW", "64"))
+# The server splits long output into 4096-byte fragments; this only guards against garbage lengths.
+MAX_PACKET = 1024 * 1024
+# A command slower than this, a transport error rate above this, or a server tick time
+# above this means the server is struggling and the pipeline window is cut.
+SLOW_COMMAND = float(os.environ.get("RCON_SLOW_COMMAND", "0.25"))
+MAX_ERROR_RATE = 0.2
+BUSY_MSPT = float(os.environ.get("RCON_BUSY_MSPT", "50"))
+EWMA_ALPHA = 0.1
+BACKOFF_MAX = 30
+# Pool maintenance: idle connections are probed (and dropped ones reconnected) this often,
+# the pool grows while requests waited longer than POOL_GROW_WAIT for a connection and
+# shrinks after POOL_SHRINK_AFTER quiet intervals.
+HEALTH_INTERVAL = float(os.environ.get("RCON_HEALTH_INTERVAL", "5"))
+POOL_GROW_WAIT = 0.1
+POOL_SHRINK_AFTER = 6
+# Consecutive transport failures before the breaker opens, and its cooldown range.
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 2
+BREAKER_COOLDOWN_MAX = 60
+# Packet type the server does not understand; it answers with "Unknown request 0" and the same id.
+SENTINEL_TYPE = 0
+
+
+class RconUnavailable(ConnectionError):
+    pass
+
+
+class _RateController:
+    # AIMD on the pipeline window: grow by one per healthy response, halve (at most once
+    # per smoothed command latency) while the server is struggling. At a window of one a
+    # struggling server also gets a pause between commands.
+    def __init__(self, max_window=PIPELINE_WINDOW):
+        self.max_window = max_window
+        self.window = max_window
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.mspt = None
+        self._last_cut = 0.0
+
+    @property
+    def struggling(self):
+        return (self.latency > SLOW_COMMAND or self.error_rate > MAX_ERROR_RATE
+                or (self.mspt is not None and self.mspt > BUSY_MSPT))
+
+    @property
+    def delay(self):
+        if self.window > 1 or not self.struggling:
+            return 0.0
+        return min(1.0, max(self.latency, 0.05))
+
+    def observe(self, latency):
+        self.latency += EWMA_ALPHA * (latency - self.latency)
+        self.error_rate -= EWMA_ALPHA * self.error_rate
+        self._adjust()
+
+    def observe_error(self):
+        self.error_rate += EWMA_ALPHA * (1 - self.error_rate)
+        self._adjust()
+
+    def observe_mspt(self, mspt):
+        self.mspt = mspt
+        self._adjust()
+
+    def _adjust(self):
+        if not self.struggling:
+            self.window = min(self.max_window, self.window + 1)
+            return
+        now = time.monotonic()
+        if now - self._last_cut >= max(self.latency, 0.1):
+            self.window = max(1, self.window // 2)
+            self._last_cut = now
+
+    def stats(self):
+        return {
+            "window": self.window,
+            "latency_ms": round(self.latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "mspt": self.mspt,
+        }
+
+
+class _CircuitBreaker:
+    # Closed until BREAKER_THRESHOLD consecutive failures, then open: every command fails
+    # fast until the (jittered, doubling) cooldown passes and a single trial is let through.
+    def __init__(self):
+        self.failures = 0
+        self.cooldown = BREAKER_COOLDOWN
+        self.open_until = 0.0
+        self._trial_started = None
+
+    @property
+    def state(self):
+        if self.failures < BREAKER_THRESHOLD:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half-open"
+
+    def check(self):
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        if state == "half-open" and (self._trial_started is None
+                                     or now - self._trial_started > 2 * READ_TIMEOUT):
+            self._trial_started = now
+            return
+        raise RconUnavailable("RCON circuit open: Minecraft server is not responding")
+
+    def record_success(self):
+        self.failures = 0
+        self.cooldown = BREAKER_COOLDOWN
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures < BREAKER_THRESHOLD:
+            return
+        if self._trial_started is not None:
+            self.cooldown = min(BREAKER_COOLDOWN_MAX, self.cooldown * 2)
+        self._trial_started = None
+        self.open_until = time.monotonic() + self.cooldown * random.uniform(0.5, 1.0)
+        if self.failures == BREAKER_THRESHOLD:
+            print(f"[RCON] Circuit opened after {self.failures} consecutive failures")
+
+
+class _Response:
+    __slots__ = ("future", "fragments", "queue")
+
+    def __init__(self, future, queue=None):
+        self.future = future
+        self.fragments = []
+        self.queue = queue
+
+    def add(self, payload):
+        if self.queue is not None:
+            self.queue.put_nowait(payload)
+        else:
+            self.fragments.append(payload)
+
+    def finish(self):
+        if self.queue is not None:
+            self.queue.put_nowait(None)
+        if not self.future.done():
+            self.future.set_result(b"".join(self.fragments).decode("utf-8", errors="replace"))
+
+    def fail(self, error):
+        if self.queue is not None:
+            self.queue.put_nowait(error)
+        if not self.future.done():
+            self.future.set_exception(error)
+            # Streaming callers read the error from the queue instead.
+            if self.queue is not None:
+                self.future.exception()
+
 
 class RconClient:
-    def __init__(self, host="localhost", port=25575, password=None):
+    def __init__(self, host="localhost", port=25575, password=None,
+                 controller=None, breaker=None):
         self.host = host
         self.port = port
         self.password = password or os.environ.get("RCON_PASSWORD", "minecraft-ai-builder")
-        self.sock = None
         self.request_id = 0
         self.max_retries = 5
         self.retry_delay = 2
-        self._commands_sent = 0
+        self.controller = controller or _RateController()
+        self.breaker = breaker or _CircuitBreaker()
+        self.last_used = 0.0
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending: dict[int, _Response] = {}
+        self._sentinels: dict[int, int] = {}
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self):
+        return self._writer is not None
 
-    def connect(self):
+    async def connect(self):
         self.disconnect()
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.settimeout(15)
-        self.sock.connect((self.host, self.port))
-        self._send_packet(3, self.password)
-        response = self._read_packet()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), READ_TIMEOUT)
+        try:
+            self._write_packet(3, self.password)
+            response = await asyncio.wait_for(self._read_packet(), READ_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            self.disconnect()
+            raise ConnectionError(f"RCON authentication failed: {e}")
         if response["id"] == -1:
             self.disconnect()
             raise Exception("RCON authentication failed")
-        self._commands_sent = 0
+        self._read_task = asyncio.create_task(self._read_loop())
         return True
 
-    def disconnect(self):
-        if self.sock:
+    def disconnect(self, reason: Exception = None):
+        if self._read_task and self._read_task is not asyncio.current_task():
+            self._read_task.cancel()
+        self._read_task = None
+        if self._writer:
             try:
-                self.sock.shutdown(socket.SHUT_RDWR)
+                self._writer.close()
             except Exception:
                 pass
-            try:
-                self.sock.close()
-            except Exception:
-                pass
-            self.sock = None
+        self._reader = None
+        self._writer = None
+        pending, self._pending = self._pending, {}
+        self._sentinels = {}
+        for response in pending.values():
+            response.fail(reason or ConnectionError("RCON connection closed"))
 
-    def reconnect(self):
-        self.disconnect()
-        time.sleep(1)
-        for attempt in range(self.max_retries):
-            try:
-                self.connect()
-                return True
-            except Exception:
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay * (attempt + 1))
-                else:
-                    raise
+    def _backoff(self, attempt):
+        # Full jitter keeps clients that failed together from retrying in lockstep.
+        return random.uniform(0, min(BACKOFF_MAX, self.retry_delay * 2 ** (attempt - 1)))
 
-    def command(self, cmd):
-        for attempt in range(self.max_retries):
+    async def _ensure_connection(self):
+        async with self._connect_lock:
+            if not self.connected:
+                await self.connect()
+
+    async def command(self, cmd):
+        result = (await self.pipeline([cmd]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def pipeline(self, cmds, window=PIPELINE_WINDOW):
+        # Commands are written in order and the server answers them in order, so after a
+        # dropped connection we resume from the first command that has no response yet.
+        results = [None] * len(cmds)
+        done = 0
+        attempt = 0
+        controller = self.controller
+        while done < len(cmds):
+            in_flight = deque()
             try:
-                if not self.sock:
-                    self.connect()
-                self._send_packet(2, cmd)
-                response = self._read_packet()
-                self._commands_sent += 1
-                if self._commands_sent % 500 == 0:
-                    time.sleep(0.1)
-                return response["payload"]
-            except Exception:
-                self.disconnect()
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay * (attempt + 1))
-                else:
-                    raise
+                self.breaker.check()
+                await self._ensure_connection()
+                sent = done
+                last_response = time.monotonic()
+                while done < len(cmds):
+                    delay = controller.delay
+                    if delay and not in_flight:
+                        await asyncio.sleep(delay)
+                    while sent < len(cmds) and len(in_flight) < min(window, controller.window):
+                        in_flight.append((time.monotonic(), self._send_command(cmds[sent])))
+                        sent += 1
+                    await self._writer.drain()
+                    sent_at, future = in_flight.popleft()
+                    results[done] = await self._wait(future)
+                    # Time spent queued behind earlier pipelined commands is not the server's fault.
+                    now = time.monotonic()
+                    controller.observe(now - max(sent_at, last_response))
+                    last_response = now
+                    self.breaker.record_success()
+                    done += 1
+                    attempt = 0
+            except RconUnavailable as e:
+                for i in range(done, len(cmds)):
+                    results[i] = e
+                break
+            except Exception as e:
+                self.disconnect(e if isinstance(e, ConnectionError) else None)
+                for _, future in in_flight:
+                    if not future.cancelled():
+                        future.exception()
+                controller.observe_error()
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.max_retries:
+                    for i in range(done, len(cmds)):
+                        results[i] = e
+                    break
+                await asyncio.sleep(self._backoff(attempt))
+        return results
 
-    def ensure_connected(self):
+    async def probe(self):
+        # One connection attempt or ping, never a retry loop; used off the request path.
         try:
-            if self.sock:
-                self.sock.settimeout(2)
-                self._send_packet(2, "list")
-                self._read_packet()
-                self.sock.settimeout(15)
-                return True
+            self.breaker.check()
+            if self.connected:
+                await asyncio.wait_for(self._wait(self._send_ping()), 2)
+            else:
+                await self._ensure_connection()
+            self.breaker.record_success()
+            return True
+        except RconUnavailable:
+            return False
         except Exception:
-            pass
-        self.disconnect()
-        return self.reconnect()
+            self.disconnect()
+            self.breaker.record_failure()
+            return False
+        finally:
+            self.last_used = time.monotonic()
 
-    def _send_packet(self, packet_type, payload):
-        if not self.sock:
+    async def stream(self, cmd):
+        # Yields the output of one command fragment by fragment, for outputs too big to buffer.
+        await self._ensure_connection()
+        queue = asyncio.Queue()
+        self._send_command(cmd, queue)
+        await self._writer.drain()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            try:
+                fragment = await asyncio.wait_for(queue.get(), READ_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.disconnect()
+                raise ConnectionError("RCON read timed out")
+            if isinstance(fragment, Exception):
+                raise fragment
+            if fragment is None:
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield tail
+                return
+            text = decoder.decode(fragment)
+            if text:
+                yield text
+
+    def _write_packet(self, packet_type, payload):
+        if not self._writer:
             raise ConnectionError("Not connected to RCON")
-        self.request_id = (self.request_id + 1) % 2147483647
+        self.request_id = self.request_id % 2147483647 + 1
         data = struct.pack("<ii", self.request_id, packet_type) + payload.encode("utf-8") + b"\x00\x00"
         packet = struct.pack("<i", len(data)) + data
-        self.sock.sendall(packet)
-
-    def _read_packet(self):
-        raw_len = self._recv_exact(4)
-        length = struct.unpack("<i", raw_len)[0]
-        if length > 4096:
-            raise Exception(f"RCON packet too large: {length}")
-        data = self._recv_exact(length)
-        request_id = struct.unpack("<i", data[0:4])[0]
-        packet_type = struct.unpack("<i", data[4:8])[0]
-        payload = data[8:-2].decode("utf-8", errors="replace")
-        return {"id": request_id, "type": packet_type, "payload": payload}
-
-    def _recv_exact(self, n):
-        if not self.sock:
-            raise ConnectionError("Not connected to RCON")
-        data = b""
-        while len(data) < n:
-            try:
-                chunk = self.sock.recv(n - len(data))
-            except socket.timeout:
-                raise ConnectionError("RCON read timed out")
-            if not chunk:
-                raise ConnectionError("RCON connection closed")
-            data += chunk
-        return data
+        self._writer.write(packet)
+        return self.request_id
+
+    def _send_command(self, cmd, queue=None):
+        # Every command is followed by a sentinel packet. Responses arrive in order, so
+        # every fragment of the command's output has been received once the sentinel's
+        # reply shows up.
+        command_id = self._write_packet(2, cmd)
+        sentinel_id = self._write_packet(SENTINEL_TYPE, "")
+        response = _Response(asyncio.get_running_loop().create_future(), queue)
+        self._pending[command_id] = response
+        self._sentinels[sentinel_id] = command_id
+        return response.future
+
+    def _send_ping(self):
+        # A lone sentinel is answered by the RCON thread without running anything on the
+        # server's main thread, which makes it a cheap liveness check.
+        ping_id = self._write_packet(SENTINEL_TYPE, "")
+        response = _Response(asyncio.get_running_loop().create_future())
+        self._pending[ping_id] = response
+        self._sentinels[ping_id] = ping_id
+        return response.future
+
+    async def _wait(self, future):
+        try:
+            return await asyncio.wait_for(future, READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionError("RCON read timed out")
+
+    async def _read_loop(self):
+        try:
+            while True:
+                packet = await self._read_packet()
+                command_id = self._sentinels.pop(packet["id"], None)
+                if command_id is not None:
+                    response = self._pending.pop(command_id, None)
+                    if response:
+                        response.finish()
+                    continue
+                response = self._pending.get(packet["id"])
+                if response:
+                    response.add(packet["payload"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.disconnect(ConnectionError(f"RCON connection lost: {e}"))
+
+    async def _read_packet(self):
+        try:
+            raw_len = await self._reader.readexactly(4)
+            length = struct.unpack("<i", raw_len)[0]
+            if length < 10 or length > MAX_PACKET:
+                raise Exception(f"RCON packet has invalid length: {length}")
+            data = await self._reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("RCON connection closed")
+        request_id, packet_type = struct.unpack("<ii", data[0:8])
+        return {"id": request_id, "type": packet_type, "payload": data[8:-2]}
+
+
+# Priority classes, highest first. Interactive traffic (chat, gamemode) is served ahead of
+# bulk build work, and build/background traffic can never hold every connection at once.
+INTERACTIVE = "interactive"
+BUILD = "build"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BUILD, BACKGROUND)
+WAIT_SAMPLES = 1024
+
+
+class _Lane:
+    def __init__(self):
+        self.active = 0
+        self.acquired = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def stats(self, cap):
+        waits = sorted(self.waits)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 1)
+
+        return {
+            "cap": cap,
+            "active": self.active,
+            "waiting": len(self.waiters),
+            "acquired": self.acquired,
+            "wait_p50_ms": percentile(0.50),
+            "wait_p99_ms": percentile(0.99),
+            "wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
 
 
 class RconPool:
-    def __init__(self, size=4, host="localhost", port=25575, password=None):
+    def __init__(self, size=4, host="localhost", port=25575, password=None,
+                 max_size=None):
         self.size = size
+        self.min_size = size
+        self.max_size = max_size or int(os.environ.get("RCON_POOL_MAX", size * 2))
         self.host = host
         self.port = port
         self.password = password
         self._clients: list[RconClient] = []
-        self._available: asyncio.Queue | None = None
+        self._free: list[RconClient] = []
+        # Rate and failure state are per server, so every connection shares them.
+        self.controller = _RateController()
+        self.breaker = _CircuitBreaker()
+        self._lanes = {priority: _Lane() for priority in PRIORITIES}
         self._initialized = False
+        self._monitor = None
+        self._recent_wait = 0.0
+        self._quiet_intervals = 0
+
+    def _new_client(self):
+        return RconClient(self.host, self.port, self.password,
+                          self.controller, self.breaker)
 
     def init(self):
-        self._available = asyncio.Queue(maxsize=self.size)
-        for _ in range(self.size):
-            client = RconClient(self.host, self.port, self.password)
+        self._free = []
+        for _ in range(self.min_size):
+            client = self._new_client()
             self._clients.append(client)
-            self._available.put_nowait(client)
+            self._free.append(client)
+        self.size = len(self._clients)
         self._initialized = True
-        print(f"[RCON] Pool initialized with {self.size} connections")
+        # Connects the pool right away and keeps it connected, so requests after a
+        # Minecraft restart do not pay for the reconnect.
+        self._monitor = asyncio.get_running_loop().create_task(self._maintain())
+        print(f"[RCON] Pool initialized with {self.size} connections (max {self.max_size})")
 
     def close(self):
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
         for client in self._clients:
             client.disconnect()
         self._clients.clear()
+        self._free.clear()
         self._initialized = False
         print("[RCON] Pool closed")
 
+    async def _maintain(self):
+        while True:
+            try:
+                await self._check_health()
+                await self._resize()
+            except Exception as e:
+                print(f"[RCON] Pool maintenance error: {e}")
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    async def _check_health(self):
+        now = time.monotonic()
+        stale = [client for client in self._free
+                 if not client.connected or now - client.last_used >= HEALTH_INTERVAL]
+        for client in stale:
+            self._free.remove(client)
+        try:
+            await asyncio.gather(*(client.probe() for client in stale))
+        finally:
+            for client in stale:
+                if client in self._clients:
+                    self._free.append(client)
+            self._dispatch()
+
+    async def _resize(self):
+        waited, self._recent_wait = self._recent_wait, 0.0
+        if waited > POOL_GROW_WAIT and self.size < self.max_size:
+            self._quiet_intervals = 0
+            client = self._new_client()
+            if await client.probe():
+                self._clients.append(client)
+                self._free.append(client)
+                self.size = len(self._clients)
+                print(f"[RCON] Pool grew to {self.size} connections (waited {waited * 1000:.0f}ms)")
+                self._dispatch()
+            return
+        self._quiet_intervals = self._quiet_intervals + 1 if waited == 0 else 0
+        if (self._quiet_intervals >= POOL_SHRINK_AFTER and self.size > self.min_size
+                and len(self._free) > 1):
+            self._quiet_intervals = 0
+            client = self._free.pop(0)
+            self._clients.remove(client)
+            client.disconnect()
+            self.size = len(self._clients)
+            print(f"[RCON] Pool shrank to {self.size} connections")
+
+    def _cap(self, priority):
+        if priority == INTERACTIVE:
+            return self.size
+        if priority == BUILD:
+            return max(1, self.size - 1)
+        return 1
+
+    def _can_take(self, priority):
+        if self._lanes[priority].active >= self._cap(priority):
+            return False
+        if priority == INTERACTIVE:
+            return True
+        # Builds and background work together still leave one connection for chat.
+        busy = self._lanes[BUILD].active + self._lanes[BACKGROUND].active
+        return busy < max(1, self.size - 1)
+
+    def _dispatch(self):
+        while self._free:
+            for priority in PRIORITIES:
+                lane = self._lanes[priority]
+                while lane.waiters and lane.waiters[0].done():
+                    lane.waiters.popleft()
+                if lane.waiters and self._can_take(priority):
+                    lane.active += 1
+                    lane.waiters.popleft().set_result(self._take_free())
+                    break
+            else:
+                return
+
+    def _take_free(self):
+        for i in range(len(self._free) - 1, -1, -1):
+            if self._free[i].connected:
+                return self._free.pop(i)
+        return self._free.pop()
+
+    def _release(self, priority, client):
+        self._lanes[priority].active -= 1
+        client.last_used = time.monotonic()
+        if client in self._clients:
+            self._free.append(client)
+        self._dispatch()
+
     @asynccontextmanager
-    async def acquire(self):
+    async def acquire(self, priority: str = BUILD):
         if not self._initialized:
             self.init()
-        client = await self._available.get()
+        lane = self._lanes[priority]
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        self._dispatch()
+        try:
+            client = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(priority, waiter.result())
+            raise
+        waited = time.monotonic() - started
+        lane.acquired += 1
+        lane.waits.append(waited)
+        self._recent_wait = max(self._recent_wait, waited)
         try:
             yield client
         finally:
-            self._available.put_nowait(client)
+            self._release(priority, client)
+
+    def observe_mspt(self, mspt: float):
+        self.controller.observe_mspt(mspt)
 
-    async def command(self, cmd: str) -> str:
-        async with self.acquire() as client:
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, client.command, cmd)
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "free": len(self._free),
+            "circuit": self.breaker.state,
+            "rate": self.controller.stats(),
+            "lanes": {priority: lane.stats(self._cap(priority))
+                      for priority, lane in self._lanes.items()},
+        }
 
-    async def command_safe(self, cmd: str, label: str = "RCON") -> str | None:
+    async def command(self, cmd: str, priority: str = BUILD) -> str:
+        async with self.acquire(priority) as client:
+            return await client.command(cmd)
+
+    async def command_safe(self, cmd: str, label: str = "RCON",
+                           priority: str = BUILD) -> str | None:
         try:
-            return await self.command(cmd)
+            return await self.command(cmd, priority)
         except Exception as e:
             print(f"[RCON] {label} error: {e}")
             return None
 
-    async def batch(self, cmds: list[str], label: str = "RCON") -> tuple[int, list[str]]:
-        async with self.acquire() as client:
-            loop = asyncio.get_event_loop()
+    async def batch(self, cmds: list[str], label: str = "RCON",
+                    priority: str = BUILD, failed=None) -> tuple[int, list[str]]:
+        # failed(output) lets callers treat a command the server rejected as an error too.
+        async with self.acquire(priority) as client:
             executed = 0
             errors = []
-            for cmd in cmds:
-                try:
-                    await loop.run_in_executor(None, client.command, cmd)
-                    executed += 1
-                except Exception as e:
-                    errors.append(f"{cmd}: {str(e)}")
+            for cmd, result in zip(cmds, await client.pipeline(cmds)):
+                if isinstance(result, Exception):
+                    errors.append(f"{cmd}: {str(result)}")
                     if len(errors) > 10:
                         break
+                else:
+                    executed += 1
+                    if failed and failed(result):
+                        errors.append(f"{cmd}: {result}")
             return executed, errors
+
+    async def stream(self, cmd: str, priority: str = BUILD):
+        async with self.acquire(priority) as client:
+            async for fragment in client.stream(cmd):
+                yield fragment
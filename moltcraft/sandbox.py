@@ -2,6 +2,9 @@ import ast
 import math
 import random
 
+from grid import WORLD_MIN_Y, WORLD_MAX_Y
+from voxels import BoxLog, SolidBlocks
+
 MAX_BLOCKS = 500000
 
 SAFE_BUILTINS = {
@@ -37,7 +40,7 @@ class BuildContext:
         self._bounds_z1 = plot_bounds["z1"]
         self._bounds_x2 = plot_bounds["x2"]
         self._bounds_z2 = plot_bounds["z2"]
-        self.blocks = {}
+        self.log = BoxLog()
         self.block_count = 0
 
     def _check_limit(self, count=1):
@@ -54,9 +57,12 @@ class BuildContext:
         world_z = self._origin_z + z
         if not self._in_bounds(world_x, world_z):
             return
+        if not WORLD_MIN_Y <= world_y <= WORLD_MAX_Y:
+            return
         self._check_limit(1)
+        state = self.log.state_for(block)
         self.block_count += 1
-        self.blocks[(x, y, z)] = block
+        self.log.add(x, y, z, x, y, z, state)
 
     def fill(self, x1, y1, z1, x2, y2, z2, block):
         world_x1 = self._origin_x + x1
@@ -73,27 +79,40 @@ class BuildContext:
             return
         if max_wz < self._bounds_z1 or min_wz > self._bounds_z2:
             return
+        min_wy = min(world_y1, world_y2)
+        max_wy = max(world_y1, world_y2)
+        if max_wy < WORLD_MIN_Y or min_wy > WORLD_MAX_Y:
+            return
         clamped_x1 = max(min_wx, self._bounds_x1)
         clamped_x2 = min(max_wx, self._bounds_x2)
         clamped_z1 = max(min_wz, self._bounds_z1)
         clamped_z2 = min(max_wz, self._bounds_z2)
-        clamped_y1 = min(world_y1, world_y2)
-        clamped_y2 = max(world_y1, world_y2)
+        clamped_y1 = max(min_wy, WORLD_MIN_Y)
+        clamped_y2 = min(max_wy, WORLD_MAX_Y)
         volume = (clamped_x2 - clamped_x1 + 1) * (clamped_y2 - clamped_y1 + 1) * (clamped_z2 - clamped_z1 + 1)
         self._check_limit(volume)
+        state = self.log.state_for(block)
         self.block_count += volume
-        for wx in range(clamped_x1, clamped_x2 + 1):
-            for wy in range(clamped_y1, clamped_y2 + 1):
-                for wz in range(clamped_z1, clamped_z2 + 1):
-                    rel_x = wx - self._origin_x
-                    rel_y = wy - self._origin_y
-                    rel_z = wz - self._origin_z
-                    self.blocks[(rel_x, rel_y, rel_z)] = block
+        self.log.add(
+            clamped_x1 - self._origin_x, clamped_y1 - self._origin_y, clamped_z1 - self._origin_z,
+            clamped_x2 - self._origin_x, clamped_y2 - self._origin_y, clamped_z2 - self._origin_z,
+            state,
+        )
 
     def clear(self):
-        self.blocks.clear()
+        self.log.clear()
         self.block_count = 0
 
+    def to_grid(self):
+        return self.log.to_grid(
+            self._bounds_x1 - self._origin_x,
+            WORLD_MIN_Y - self._origin_y,
+            self._bounds_z1 - self._origin_z,
+            self._bounds_x2 - self._bounds_x1 + 1,
+            WORLD_MAX_Y - WORLD_MIN_Y + 1,
+            self._bounds_z2 - self._bounds_z1 + 1,
+        )
+
 
 def validate_script_ast(script):
     try:
@@ -133,23 +152,74 @@ def validate_script_ast(script):
     return True, None
 
 
+def _is_constant_seed(call):
+    return bool(call.args) and not call.keywords and all(isinstance(arg, ast.Constant) for arg in call.args)
+
+
+def uses_unseeded_random(script):
+    try:
+        tree = ast.parse(script)
+    except SyntaxError:
+        return False
+
+    uses = sorted(
+        (node.lineno, node.col_offset) for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and node.id == "random"
+    )
+    if not uses:
+        return False
+
+    # Any reseed without constant arguments (random.seed() draws from the OS), and any
+    # use of random other than random.<attr>, which could hide one, makes the output vary.
+    seed_calls = set()
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "seed"):
+            if not _is_constant_seed(node):
+                return True
+            seed_calls.add(node.func)
+    attribute_uses = set()
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                and node.value.id == "random"):
+            attribute_uses.add(node.value)
+            if node.attr == "seed" and node not in seed_calls:
+                return True
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id == "random" and node not in attribute_uses:
+            return True
+
+    # Deterministic only if the script's first touch of random is a top-level
+    # random.seed(<constant>) call.
+    for stmt in tree.body:
+        if not isinstance(stmt, ast.Expr) or not isinstance(stmt.value, ast.Call):
+            continue
+        call = stmt.value
+        func = call.func
+        if (isinstance(func, ast.Attribute) and func.attr == "seed"
+                and isinstance(func.value, ast.Name) and func.value.id == "random"
+                and _is_constant_seed(call)):
+            return (func.value.lineno, func.value.col_offset) != uses[0]
+    return True
+
+
 def execute_build_script(script, plot_origin, plot_bounds):
     is_valid, error_msg = validate_script_ast(script)
     if not is_valid:
         return {
             "success": False,
-            "blocks": {},
+            "blocks": None,
             "block_count": 0,
             "error": error_msg,
         }
     
     try:
         build = BuildContext(plot_origin, plot_bounds)
-        restricted_globals = {"__builtins__": SAFE_BUILTINS, "build": build, "math": math, "random": random}
+        restricted_globals = {"__builtins__": SAFE_BUILTINS, "build": build, "math": math, "random": random.Random()}
         exec(script, restricted_globals)
         return {
             "success": True,
-            "blocks": dict(build.blocks),
+            "blocks": SolidBlocks.from_grid(build.to_grid()).share(),
             "block_count": build.block_count,
             "error": None,
         }
@@ -158,7 +228,7 @@ def execute_build_script(script, plot_origin, plot_bounds):
         error_msg = str(e)[:200]
         return {
             "success": False,
-            "blocks": {},
+            "blocks": None,
             "block_count": 0,
             "error": f"{error_type}: {error_msg}",
         }
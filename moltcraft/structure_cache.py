@@ -0,0 +1,182 @@
+import os
+import re
+import glob
+import json
+import hashlib
+
+from nbt_builder import STRUCTURE_DIR, DATA_VERSION, structure_stem, blocks_to_nbt_pieces
+from sandbox import uses_unseeded_random
+from voxels import SolidBlocks, diff_blocks
+
+CACHE_VERSION = 2
+MAX_ENTRIES_PER_PROJECT = 3
+MAX_CACHE_BYTES = int(os.environ.get("STRUCTURE_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Block sets of encoded structures, kept next to (not inside) the structures
+# directory so rebuilds can be diffed against whatever is currently placed.
+STATE_DIR = os.path.join(STRUCTURE_DIR, "..", "placed")
+
+
+def cache_key(script: str, origin: dict, bounds: dict) -> str | None:
+    if uses_unseeded_random(script):
+        return None
+    material = json.dumps([CACHE_VERSION, DATA_VERSION, script, origin, bounds],
+                          sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _entry_path(stem: str) -> str:
+    return os.path.join(STRUCTURE_DIR, f"{stem}.json")
+
+
+def _nbt_path(stem: str) -> str:
+    return os.path.join(STRUCTURE_DIR, f"{stem}.nbt")
+
+
+def _state_path(stem: str) -> str:
+    return os.path.join(STATE_DIR, f"{stem}.blocks")
+
+
+def _base_stem(name: str) -> str:
+    return re.sub(r"_p\d+$", "", name)
+
+
+def _remove(stem: str):
+    pieces = glob.glob(os.path.join(STRUCTURE_DIR, f"{stem}_p*.nbt"))
+    for path in (_entry_path(stem), _nbt_path(stem), _state_path(stem), *pieces):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _touch(stem: str):
+    for path in (_entry_path(stem), _nbt_path(stem), _state_path(stem)):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+def lookup(project_id: int, key: str) -> dict | None:
+    stem = structure_stem(project_id, key)
+    try:
+        with open(_entry_path(stem), "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("key") != key:
+        return None
+    if not all(os.path.exists(_nbt_path(piece["structure"].split(":", 1)[1]))
+               for piece in entry["pieces"]):
+        _remove(stem)
+        return None
+    _touch(stem)
+    return entry
+
+
+def _store(stem: str, entry: dict):
+    path = _entry_path(stem)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def evict(project_id: int, keep: set):
+    entries = []
+    for path in glob.glob(os.path.join(STRUCTURE_DIR, f"build_{project_id}_*.json")):
+        stem = os.path.basename(path)[:-len(".json")]
+        if stem not in keep:
+            entries.append((os.path.getmtime(path), stem))
+    entries.sort(reverse=True)
+    keep_stems = set(keep) | {stem for _, stem in entries[:MAX_ENTRIES_PER_PROJECT - 1]}
+    for _, stem in entries[MAX_ENTRIES_PER_PROJECT - 1:]:
+        _remove(stem)
+
+    # Uncacheable builds and diffs have no entry file; only the newest build is worth keeping.
+    orphans = glob.glob(os.path.join(STRUCTURE_DIR, f"build_{project_id}_*.nbt"))
+    orphans += glob.glob(os.path.join(STATE_DIR, f"build_{project_id}_*.blocks"))
+    for path in orphans:
+        stem = _base_stem(os.path.basename(path).rsplit(".", 1)[0])
+        if stem not in keep_stems:
+            _remove(stem)
+    legacy = os.path.join(STRUCTURE_DIR, f"build_{project_id}.nbt")
+    if os.path.exists(legacy):
+        try:
+            os.remove(legacy)
+        except OSError:
+            pass
+
+    files = []
+    total = 0
+    for path in glob.glob(os.path.join(STRUCTURE_DIR, "build_*.nbt")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        total += stat.st_size
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    for _, size, path in files:
+        if total <= MAX_CACHE_BYTES:
+            break
+        if _base_stem(os.path.basename(path)[:-len(".nbt")]) in keep:
+            continue
+        # Removing a single piece is enough to invalidate its entry on the next lookup.
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def _load_state(stem: str):
+    try:
+        return SolidBlocks.load(_state_path(stem))
+    except (OSError, ValueError, EOFError):
+        return None
+
+
+def _diff_against(project_id: int, previous_stem: str, blocks, origin: dict) -> dict | None:
+    previous = _load_state(previous_stem)
+    if previous is None:
+        return None
+    changes = diff_blocks(previous, blocks)
+    stem = f"{structure_stem(project_id)}_diff"
+    return {
+        "pieces": blocks_to_nbt_pieces(changes, stem, origin),
+        "stem": stem,
+        "bounds": changes.bounds,
+        "count": len(changes),
+    }
+
+
+def build_structure(blocks_ref: dict, project_id: int, key: str | None,
+                    block_count: int, origin: dict, previous_stem: str = None) -> dict:
+    os.makedirs(STRUCTURE_DIR, exist_ok=True)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    stem = structure_stem(project_id, key)
+    blocks = SolidBlocks.open_shared(blocks_ref)
+    try:
+        pieces = blocks_to_nbt_pieces(blocks, stem, origin)
+        blocks.save(_state_path(stem))
+        diff = _diff_against(project_id, previous_stem, blocks, origin) if previous_stem else None
+    finally:
+        blocks.close()
+    if key:
+        _store(stem, {
+            "key": key,
+            "stem": stem,
+            "pieces": pieces,
+            "bounds": blocks_ref["bounds"],
+            "block_count": block_count,
+        })
+    evict(project_id, keep={stem, diff["stem"]} if diff else {stem})
+    return {"stem": stem, "pieces": pieces, "diff": diff}
+
+
+def build_diff(project_id: int, previous_stem: str, stem: str, origin: dict) -> dict | None:
+    current = _load_state(stem)
+    if current is None:
+        return None
+    return _diff_against(project_id, previous_stem, current, origin)
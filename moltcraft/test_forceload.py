@@ -0,0 +1,61 @@
+import pytest
+
+from fake_rcon import FakeRconServer
+from forceload import ForceloadCache, _chunks, _key
+from grid import get_decoration_regions, get_forceload_commands, get_plot_bounds
+from rcon import RconPool
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def server():
+    server = await FakeRconServer(port=0).start()
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def pool(server):
+    pool = RconPool(size=2, host=server.host, port=server.port, password=server.password, max_size=2)
+    pool.init()
+    yield pool
+    pool.close()
+
+
+async def test_region_readiness_is_checked_in_request_sized_commands(server, pool):
+    region = get_decoration_regions({(x, z) for x in range(3) for z in range(3)})[0]
+    cache = ForceloadCache(pool)
+
+    assert not await cache.wait_ready(region["bounds"], timeout=0)
+    for cmd in get_forceload_commands(region["bounds"]):
+        await pool.command(cmd)
+    assert await cache.wait_ready(region["bounds"], timeout=0)
+
+    checks = [cmd for cmd in server.commands if cmd.startswith("/execute")]
+    assert len(checks) > 2
+    assert all(len(cmd.encode()) <= 1446 for cmd in checks)
+
+
+async def test_eviction_keeps_chunks_a_held_area_shares(server, pool):
+    plot = get_plot_bounds(0, 0)
+    region = get_decoration_regions({(x, z) for x in range(3) for z in range(3)})[0]
+    far = get_plot_bounds(20, 20)
+    cache = ForceloadCache(pool, max_chunks=100)
+
+    assert await cache.acquire(plot)
+    assert await cache.acquire(region["bounds"], timeout=0)
+    cache.release(region["bounds"])
+    plot_chunks = set(_chunks(_key(plot)))
+    assert plot_chunks < server.forceloaded
+
+    # Loading the far plot pushes the cache over its limit; the released region goes.
+    assert await cache.acquire(far)
+    assert cache.evictions == 1
+    assert server.forceloaded == plot_chunks | set(_chunks(_key(far)))
+    assert cache.chunks == len(server.forceloaded)
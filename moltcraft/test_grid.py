@@ -0,0 +1,49 @@
+import re
+
+from grid import FILL_LIMIT, GROUND_Y, WORLD_MAX_Y, get_plot_bounds, get_reset_commands
+
+FILL_RE = re.compile(r"/fill (-?\d+) (-?\d+) (-?\d+) (-?\d+) (-?\d+) (-?\d+) (\S+)$")
+
+
+def _filled(commands):
+    cells = {}
+    for cmd in commands:
+        x1, y1, z1, x2, y2, z2, block = FILL_RE.match(cmd).groups()
+        x1, y1, z1, x2, y2, z2 = map(int, (x1, y1, z1, x2, y2, z2))
+        assert (x2 - x1 + 1) * (y2 - y1 + 1) * (z2 - z1 + 1) <= FILL_LIMIT
+        for x in range(x1, x2 + 1):
+            for y in range(y1, y2 + 1):
+                for z in range(z1, z2 + 1):
+                    assert (x, y, z) not in cells
+                    cells[(x, y, z)] = block
+    return cells
+
+
+def test_reset_commands_tile_a_tall_build():
+    b = get_plot_bounds(1, -2)
+    commands = get_reset_commands(b, [b["x1"] - 5, GROUND_Y - 3, b["z1"], b["x2"], WORLD_MAX_Y + 9, b["z2"]])
+
+    cells = _filled(commands)
+
+    assert len(cells) == 64 * 64 * (WORLD_MAX_Y - GROUND_Y + 1)
+    assert {block for (_, y, _), block in cells.items() if y == GROUND_Y} == {"minecraft:grass_block"}
+    assert {block for (_, y, _), block in cells.items() if y > GROUND_Y} == {"minecraft:air"}
+    assert min(x for x, _, _ in cells) == b["x1"]
+
+
+def test_reset_commands_above_the_floor_only_clear():
+    b = get_plot_bounds(0, 0)
+
+    cells = _filled(get_reset_commands(b, [0, GROUND_Y + 2, 0, 3, GROUND_Y + 5, 1]))
+
+    assert cells == {
+        (x, y, z): "minecraft:air"
+        for x in range(4) for y in range(GROUND_Y + 2, GROUND_Y + 6) for z in range(2)
+    }
+
+
+def test_reset_commands_outside_the_plot():
+    b = get_plot_bounds(0, 0)
+
+    assert get_reset_commands(b, [b["x2"] + 1, GROUND_Y, 0, b["x2"] + 9, GROUND_Y + 4, 3]) is None
+    assert get_reset_commands(b, [0, GROUND_Y - 4, 0, 3, GROUND_Y - 1, 3]) is None
@@ -0,0 +1,90 @@
+from array import array
+
+import nbtlib
+import pytest
+
+import grid
+import nbt_builder
+from voxels import SolidBlocks
+
+
+@pytest.fixture(autouse=True)
+def structure_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(nbt_builder, "STRUCTURE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _load(structure_dir, name):
+    assert name.startswith("moltcraft:")
+    return nbtlib.load(structure_dir / f"{name.split(':', 1)[1]}.nbt")
+
+
+def _palette(structure):
+    return [
+        (str(entry["Name"]), {k: str(v) for k, v in entry.get("Properties", {}).items()})
+        for entry in structure["palette"]
+    ]
+
+
+def _blocks(structure):
+    return {tuple(int(c) for c in b["pos"]): int(b["state"]) for b in structure["blocks"]}
+
+
+def test_mixed_palette_structure(structure_dir):
+    palette = [
+        "minecraft:oak_stairs[half=bottom,facing=north]",
+        "stone",
+        "minecraft:oak_log[axis=x]",
+        "minecraft:glass",
+    ]
+    placed = {
+        (2, -1, 5): 0,
+        (3, -1, 5): 1,
+        (2, 0, 7): 2,
+        (4, 3, 6): 3,
+        (3, 2, 5): 2,
+    }
+    positions = array("h")
+    states = array("H")
+    for pos, state in placed.items():
+        positions.extend(pos)
+        states.append(state)
+    blocks = SolidBlocks(palette, positions, states, SolidBlocks._bounds_of(positions))
+
+    structure = _load(structure_dir, nbt_builder.blocks_to_nbt(blocks, "mixed"))
+
+    assert int(structure["DataVersion"]) == nbt_builder.DATA_VERSION
+    assert [int(v) for v in structure["size"]] == [3, 5, 3]
+    assert _palette(structure) == [
+        ("minecraft:oak_stairs", {"facing": "north", "half": "bottom"}),
+        ("minecraft:stone", {}),
+        ("minecraft:oak_log", {"axis": "x"}),
+        ("minecraft:glass", {}),
+    ]
+    assert _blocks(structure) == {(x - 2, y + 1, z - 5): s for (x, y, z), s in placed.items()}
+    assert len(structure["entities"]) == 0
+
+
+def test_reset_template(structure_dir, monkeypatch):
+    monkeypatch.setattr(grid, "PLOT_SIZE", 8)
+    monkeypatch.setattr(nbt_builder, "RESET_HEIGHT", 4)
+
+    structure = _load(structure_dir, nbt_builder.generate_reset_nbt())
+
+    assert [int(v) for v in structure["size"]] == [8, 4, 8]
+    assert _palette(structure) == [("minecraft:grass_block", {}), ("minecraft:air", {})]
+    blocks = _blocks(structure)
+    assert len(blocks) == len(structure["blocks"]) == 8 * 4 * 8
+    assert blocks == {
+        (x, y, z): 0 if y == 0 else 1
+        for x in range(8) for y in range(4) for z in range(8)
+    }
+
+
+def test_sized_reset_templates_are_cleaned_up(structure_dir):
+    for name in ("plot_reset.nbt", "plot_reset_64x128x64.nbt", "plot_clear_8x8x8.nbt", "build_1_abc.nbt"):
+        (structure_dir / name).write_bytes(b"")
+
+    nbt_builder.cleanup_sized_reset_templates()
+
+    assert sorted(p.name for p in structure_dir.iterdir()) == ["build_1_abc.nbt", "plot_reset.nbt"]
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from fake_rcon import FakeRconServer
+from rcon import (BACKGROUND, BREAKER_THRESHOLD, BUILD, INTERACTIVE, RconClient, RconPool,
+                  RconUnavailable)
+
+pytestmark = pytest.mark.anyio
+
+UNICODE_CMD = "héllo wörld ✓ " * 20
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def server():
+    server = await FakeRconServer(port=0, fragment_size=7).start()
+    yield server
+    await server.close()
+
+
+def _client(server, **kwargs):
+    client = RconClient(server.host, server.port, server.password, **kwargs)
+    client.retry_delay = 0.001
+    return client
+
+
+async def test_fragmented_responses_are_reassembled(server):
+    client = _client(server)
+    try:
+        tick = await client.command("tick query")
+        unknown = await client.command(UNICODE_CMD)
+    finally:
+        client.disconnect()
+
+    assert tick == server._tick_query(None)
+    # Multi-byte characters are split across the 7-byte fragments.
+    assert unknown == f"Unknown or incomplete command, see below for error\n{UNICODE_CMD}<--[HERE]"
+
+
+async def test_stream_yields_output_piece_by_piece(server):
+    pool = RconPool(size=2, host=server.host, port=server.port, password=server.password, max_size=2)
+    pool.init()
+    try:
+        pieces = [piece async for piece in pool.stream(UNICODE_CMD)]
+    finally:
+        pool.close()
+
+    assert len(pieces) > 1
+    assert "".join(pieces) == f"Unknown or incomplete command, see below for error\n{UNICODE_CMD}<--[HERE]"
+
+
+async def test_pipeline_resumes_after_dropped_connections():
+    server = await FakeRconServer(port=0, drop_every=7).start()
+    client = _client(server)
+    cmds = [f"fill 0 0 0 1 1 {i}" for i in range(60)]
+    try:
+        results = await client.pipeline(cmds)
+    finally:
+        client.disconnect()
+        await server.close()
+
+    assert server.drops >= 5
+    assert results == ["Successfully filled 1 block(s)"] * len(cmds)
+    # Every command reached the server, in order; the dropped ones were sent again.
+    assert list(dict.fromkeys(server.commands)) == cmds
+
+
+async def test_build_and_background_leave_a_connection_for_interactive(server):
+    pool = RconPool(size=4, host=server.host, port=server.port, password=server.password, max_size=4)
+    pool.init()
+    release = asyncio.Event()
+    acquired = []
+
+    async def hold(priority):
+        async with pool.acquire(priority):
+            acquired.append(priority)
+            await release.wait()
+
+    await pool.command("list", INTERACTIVE)
+    holders = [asyncio.create_task(hold(p)) for p in (BUILD, BACKGROUND, BUILD, BUILD)]
+    try:
+        await asyncio.sleep(0.1)
+        # Four connections, but build and background together get only three.
+        assert sorted(acquired) == [BACKGROUND, BUILD, BUILD]
+        assert pool.stats()["lanes"][BUILD]["waiting"] == 1
+
+        reply = await asyncio.wait_for(pool.command("list", INTERACTIVE), 1)
+        assert reply.startswith("There are 0")
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*holders), 1)
+        assert sorted(acquired) == [BACKGROUND, BUILD, BUILD, BUILD]
+    finally:
+        release.set()
+        pool.close()
+
+
+async def test_breaker_opens_after_consecutive_failures():
+    server = await FakeRconServer(port=0).start()
+    port = server.port
+    await server.close()
+
+    client = RconClient(server.host, port, server.password)
+    client.retry_delay = 0.001
+    result = (await client.pipeline(["list"]))[0]
+
+    assert isinstance(result, ConnectionError) and not isinstance(result, RconUnavailable)
+    assert client.breaker.failures == BREAKER_THRESHOLD
+    assert client.breaker.state == "open"
+    with pytest.raises(RconUnavailable):
+        await client.command("list")
+
+    # Once the cooldown has passed, a single successful trial closes it again.
+    server = await FakeRconServer(port=port).start()
+    client.breaker.open_until = 0.0
+    try:
+        assert (await client.command("list")).startswith("There are 0")
+        assert client.breaker.state == "closed"
+    finally:
+        client.disconnect()
+        await server.close()
@@ -0,0 +1,27 @@
+import pytest
+
+from sandbox import uses_unseeded_random
+
+
+@pytest.mark.parametrize("script", [
+    "build.fill(0, 0, 0, 3, 3, 3, 'stone')",
+    "random.seed(1)\nbuild.setblock(random.randint(0, 9), 0, 0, 'stone')",
+    "random.seed('tower')\nfor i in range(3):\n    random.seed(7)\n    build.setblock(random.randint(0, 9), 0, 0, 'stone')",
+    "random.seed(1)\nrandom.seed(2)\nbuild.setblock(random.randint(0, 9), 0, 0, 'stone')",
+])
+def test_deterministic_scripts(script):
+    assert not uses_unseeded_random(script)
+
+
+@pytest.mark.parametrize("script", [
+    "build.setblock(random.randint(0, 9), 0, 0, 'stone')",
+    "x = random.random()\nrandom.seed(1)",
+    "random.seed(1)\nrandom.seed()\nbuild.setblock(random.randint(0, 9), 0, 0, 'stone')",
+    "random.seed(1)\ndef f():\n    random.seed()\nf()",
+    "random.seed(1)\nn = 5\nrandom.seed(n)",
+    "random.seed(1)\nrandom.seed(a=2)",
+    "random.seed(1)\nrng = random\nrng.seed()",
+    "random.seed(1)\nreseed = random.seed\nreseed()",
+])
+def test_nondeterministic_scripts(script):
+    assert uses_unseeded_random(script)
@@ -0,0 +1,48 @@
+from sandbox import BuildContext
+from voxels import FLOOR_BLOCK, SolidBlocks, diff_blocks
+
+ORIGIN = {"x": 0, "y": -60, "z": 0}
+BOUNDS = {"x1": -32, "z1": -32, "x2": 31, "z2": 31}
+
+
+def _build(*fills):
+    ctx = BuildContext(ORIGIN, BOUNDS)
+    for fill in fills:
+        ctx.fill(*fill)
+    return SolidBlocks.from_grid(ctx.to_grid())
+
+
+def _changes(blocks):
+    positions = blocks.positions
+    return {
+        tuple(positions[3 * i:3 * i + 3]): blocks.palette[state]
+        for i, state in enumerate(blocks.states)
+    }
+
+
+def test_diff_restores_floor_under_removed_blocks():
+    old = _build((0, 0, 0, 3, 3, 3, "minecraft:stone"))
+    new = _build((0, 1, 0, 3, 3, 3, "minecraft:stone"))
+
+    changes = _changes(diff_blocks(old, new))
+
+    assert changes == {(x, 0, z): FLOOR_BLOCK for x in range(4) for z in range(4)}
+
+
+def test_diff_clears_removed_blocks_above_the_floor():
+    old = _build((0, 0, 0, 1, 2, 1, "minecraft:stone"))
+    new = _build((0, 0, 0, 1, 0, 1, "minecraft:stone"), (0, 1, 0, 0, 1, 0, "minecraft:oak_planks"))
+
+    changes = _changes(diff_blocks(old, new))
+
+    assert changes[(0, 1, 0)] == "minecraft:oak_planks"
+    assert changes[(1, 1, 1)] == "minecraft:air"
+    assert changes[(1, 2, 1)] == "minecraft:air"
+    assert len(changes) == 8
+
+
+def test_diff_skips_floor_that_is_already_grass():
+    old = _build((0, 0, 0, 1, 0, 1, FLOOR_BLOCK))
+    new = _build()
+
+    assert len(diff_blocks(old, new)) == 0
@@ -0,0 +1,321 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import mmap
+import struct
+import tempfile
+from array import array
+
+AIR_BLOCKS = ("minecraft:air", "air")
+MAX_PALETTE = 65535
+FLOOR_BLOCK = "minecraft:grass_block"
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+SHARED_PREFIX = "moltcraft-"
+
+
+def _intern(palette, palette_index, block):
+    state = palette_index.get(block)
+    if state is not None:
+        return state
+    if block in AIR_BLOCKS:
+        state = 0
+    else:
+        if len(palette) >= MAX_PALETTE:
+            raise RuntimeError(f"Too many distinct block types (max {MAX_PALETTE - 1})")
+        state = len(palette)
+        palette.append(block)
+    palette_index[block] = state
+    return state
+
+
+class BoxLog:
+    def __init__(self):
+        self.palette = [None]
+        self._palette_index = {}
+        # Flat (x1, y1, z1, x2, y2, z2, state) records, replayed in order so later boxes win.
+        self.ops = array("i")
+
+    def state_for(self, block):
+        return _intern(self.palette, self._palette_index, block)
+
+    def add(self, x1, y1, z1, x2, y2, z2, state):
+        self.ops.extend((x1, y1, z1, x2, y2, z2, state))
+
+    def __len__(self):
+        return len(self.ops) // 7
+
+    def clear(self):
+        self.palette = [None]
+        self._palette_index = {}
+        self.ops = array("i")
+
+    def to_grid(self, min_x, min_y, min_z, size_x, size_y, size_z):
+        grid = VoxelGrid(min_x, min_y, min_z, size_x, size_y, size_z)
+        grid.palette = list(self.palette)
+        grid._palette_index = dict(self._palette_index)
+        ops = self.ops
+        for i in range(0, len(ops), 7):
+            x1, y1, z1, x2, y2, z2, state = ops[i:i + 7]
+            if x1 == x2 and y1 == y2 and z1 == z2:
+                grid.set(x1, y1, z1, state)
+            else:
+                grid.fill(x1, y1, z1, x2, y2, z2, state)
+        return grid
+
+
+class VoxelGrid:
+    def __init__(self, min_x, min_y, min_z, size_x, size_y, size_z):
+        self.min_x = min_x
+        self.min_y = min_y
+        self.min_z = min_z
+        self.size_x = size_x
+        self.size_y = size_y
+        self.size_z = size_z
+        # State 0 is "no block"; air is interned to it so it never reaches the structure.
+        self.palette = [None]
+        self._palette_index = {}
+        self.cells = array("H", bytes(2 * size_x * size_y * size_z))
+
+    def state_for(self, block):
+        return _intern(self.palette, self._palette_index, block)
+
+    def _offset(self, x, y, z):
+        return ((x - self.min_x) * self.size_y + (y - self.min_y)) * self.size_z + (z - self.min_z)
+
+    def set(self, x, y, z, state):
+        self.cells[self._offset(x, y, z)] = state
+
+    def fill(self, x1, y1, z1, x2, y2, z2, state):
+        run = array("H", [state]) * (z2 - z1 + 1)
+        cells = self.cells
+        for x in range(x1, x2 + 1):
+            for y in range(y1, y2 + 1):
+                start = self._offset(x, y, z1)
+                cells[start:start + len(run)] = run
+
+    def _rows(self):
+        size_z = self.size_z
+        empty = array("H", bytes(2 * size_z))
+        cells = self.cells
+        start = 0
+        for xi in range(self.size_x):
+            for yi in range(self.size_y):
+                row = cells[start:start + size_z]
+                start += size_z
+                if row != empty:
+                    yield self.min_x + xi, self.min_y + yi, row
+
+    def used_states(self):
+        used = set(self.cells)
+        used.discard(0)
+        return used
+
+
+class SolidBlocks:
+    def __init__(self, palette, positions, states, bounds):
+        self.palette = palette
+        self.positions = positions
+        self.states = states
+        self.bounds = bounds
+        self._mmap = None
+
+    def __len__(self):
+        return len(self.states)
+
+    @classmethod
+    def from_grid(cls, grid):
+        used = sorted(grid.used_states(), key=lambda s: grid.palette[s])
+        lut = [0] * len(grid.palette)
+        for i, state in enumerate(used):
+            lut[state] = i
+        palette = [grid.palette[state] for state in used]
+
+        positions = array("h")
+        states = array("H")
+        min_z = grid.min_z
+        for x, y, row in grid._rows():
+            for zi, state in enumerate(row):
+                if state:
+                    positions.extend((x, y, min_z + zi))
+                    states.append(lut[state])
+        return cls(palette, positions, states, cls._bounds_of(positions))
+
+    @staticmethod
+    def _bounds_of(positions):
+        if not positions:
+            return None
+        xs, ys, zs = positions[0::3], positions[1::3], positions[2::3]
+        return (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+
+    def split_chunks(self, origin_x, origin_z, max_blocks):
+        if len(self.states) <= max_blocks:
+            return [self]
+        columns = {}
+        positions = self.positions
+        for i, state in enumerate(self.states):
+            x, y, z = positions[3 * i:3 * i + 3]
+            key = ((origin_x + x) >> 4, (origin_z + z) >> 4)
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = (array("h"), array("H"))
+            column[0].extend((x, y, z))
+            column[1].append(state)
+
+        # Whole chunk columns are packed greedily into pieces of at most max_blocks;
+        # a column that is larger on its own becomes its own piece.
+        pieces = []
+        piece_positions, piece_states = array("h"), array("H")
+        for key in sorted(columns):
+            column_positions, column_states = columns[key]
+            if piece_states and len(piece_states) + len(column_states) > max_blocks:
+                pieces.append(SolidBlocks(self.palette, piece_positions, piece_states,
+                                          self._bounds_of(piece_positions)))
+                piece_positions, piece_states = array("h"), array("H")
+            piece_positions.extend(column_positions)
+            piece_states.extend(column_states)
+        if piece_states:
+            pieces.append(SolidBlocks(self.palette, piece_positions, piece_states,
+                                      self._bounds_of(piece_positions)))
+        return pieces
+
+    def share(self):
+        # Only the small header goes through pickle; the arrays travel via a file in tmpfs.
+        ref = {"path": None, "count": len(self.states), "palette": self.palette, "bounds": self.bounds}
+        if not self.states:
+            return ref
+        fd, path = tempfile.mkstemp(prefix=SHARED_PREFIX, suffix=".blocks", dir=SHARED_DIR)
+        with os.fdopen(fd, "wb") as f:
+            self.positions.tofile(f)
+            self.states.tofile(f)
+        ref["path"] = path
+        return ref
+
+    @classmethod
+    def open_shared(cls, ref):
+        count = ref["count"]
+        if not ref["path"]:
+            return cls(ref["palette"], array("h"), array("H"), ref["bounds"])
+        with open(ref["path"], "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        split = count * 3 * 2
+        blocks = cls(ref["palette"], view[:split].cast("h"), view[split:].cast("H"), ref["bounds"])
+        blocks._mmap = mm
+        return blocks
+
+    def save(self, path):
+        header = json.dumps({"palette": self.palette, "bounds": self.bounds,
+                             "count": len(self.states)}).encode("utf-8")
+        positions = array("h", self.positions)
+        states = array("H", self.states)
+        if sys.byteorder != "little":
+            positions.byteswap()
+            states.byteswap()
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=1) as f:
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(positions.tobytes())
+            f.write(states.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rb") as f:
+            header_len = struct.unpack("<I", f.read(4))[0]
+            header = json.loads(f.read(header_len))
+            positions = array("h")
+            positions.frombytes(f.read(header["count"] * 6))
+            states = array("H")
+            states.frombytes(f.read(header["count"] * 2))
+        if sys.byteorder != "little":
+            positions.byteswap()
+            states.byteswap()
+        bounds = tuple(header["bounds"]) if header["bounds"] else None
+        return cls(header["palette"], positions, states, bounds)
+
+    def close(self):
+        if self._mmap is not None:
+            if isinstance(self.positions, memoryview):
+                self.positions.release()
+                self.states.release()
+            self._mmap.close()
+            self._mmap = None
+
+
+def _scatter(grid, blocks):
+    lut = [grid.state_for(name) for name in blocks.palette]
+    cells = grid.cells
+    size_y, size_z = grid.size_y, grid.size_z
+    min_x, min_y, min_z = grid.min_x, grid.min_y, grid.min_z
+    positions = blocks.positions
+    for i, state in enumerate(blocks.states):
+        x, y, z = positions[3 * i:3 * i + 3]
+        cells[((x - min_x) * size_y + (y - min_y)) * size_z + (z - min_z)] = lut[state]
+
+
+def diff_blocks(old, new, floor_y=0):
+    boxes = [b for b in (old.bounds, new.bounds) if b is not None]
+    if not boxes:
+        return SolidBlocks([], array("h"), array("H"), None)
+    lo = [min(b[i] for b in boxes) for i in range(3)]
+    hi = [max(b[i + 3] for b in boxes) for i in range(3)]
+    sizes = [hi[i] - lo[i] + 1 for i in range(3)]
+
+    before = VoxelGrid(*lo, *sizes)
+    after = VoxelGrid(*lo, *sizes)
+    # Shared palette so equal blocks get equal states and rows compare as raw bytes.
+    after.palette = before.palette
+    after._palette_index = before._palette_index
+    _scatter(before, old)
+    _scatter(after, new)
+
+    # The reset template lays grass on the floor layer, so an empty cell there is
+    # grass, not air; otherwise removing a block would leave a hole in the floor.
+    floor_state = before.state_for(FLOOR_BLOCK)
+    changed = {}
+    positions = array("h")
+    states = array("H")
+    size_y, size_z = before.size_y, before.size_z
+    old_cells, new_cells = before.cells, after.cells
+    for row_index in range(before.size_x * size_y):
+        start = row_index * size_z
+        old_row = old_cells[start:start + size_z]
+        new_row = new_cells[start:start + size_z]
+        if old_row == new_row:
+            continue
+        x = lo[0] + row_index // size_y
+        y = lo[1] + row_index % size_y
+        if y == floor_y:
+            old_row = array("H", [state or floor_state for state in old_row])
+            new_row = array("H", [state or floor_state for state in new_row])
+        for zi in range(size_z):
+            state = new_row[zi]
+            if state != old_row[zi]:
+                positions.extend((x, y, lo[2] + zi))
+                states.append(state)
+                changed[state] = None
+
+    names = {state: before.palette[state] or "minecraft:air" for state in changed}
+    palette = sorted(set(names.values()))
+    lut = {state: palette.index(name) for state, name in names.items()}
+    states = array("H", map(lut.__getitem__, states))
+    return SolidBlocks(palette, positions, states, SolidBlocks._bounds_of(positions))
+
+
+def discard_shared(ref):
+    if ref and ref.get("path"):
+        try:
+            os.remove(ref["path"])
+        except OSError:
+            pass
+
+
+def cleanup_shared():
+    for path in glob.glob(os.path.join(SHARED_DIR, f"{SHARED_PREFIX}*.blocks")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
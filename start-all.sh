@@ -28,6 +28,9 @@ if [ -n "$REPL_DEPLOYMENT" ]; then
         echo "[World] Restoring production world from persistent storage..."
         rm -rf "$WORLD_DIR"
         cp -a "$PERSISTENT_WORLD" "$WORLD_DIR"
+        # The backup can be minutes behind the database. A fresh world id makes the API
+        # treat recorded placements and decorations as unknown instead of trusting them.
+        rm -f "$WORLD_DIR/moltcraft-world-id"
         echo "[World] Production world restored"
     else
         echo "[World] No saved production world found — Minecraft will generate a fresh one"